@@ -8,15 +8,17 @@ This application runs:
 Both servers run concurrently using threading.
 """
 
+import asyncio
 import json
 import sys
 import threading
+import time
 from pathlib import Path
-from typing import Callable
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from flask import Flask, jsonify, redirect
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
@@ -25,9 +27,21 @@ PROJECT_ROOT = Path(__file__).parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 from utils.config_loader import load_config
-from utils.event_logger import log_event, get_recent_events
+from utils.dependency_prober import get_dependency_status, start_dependency_prober, stop_dependency_prober
+from utils.event_logger import log_event, get_recent_events, iter_events, parse_event_time
+from utils.event_ring import configure_event_ring, read_recent_records
+from utils.route_executor import EXECUTION_MODES, RouteExecutor, RouteTimeoutError, load_route_function
+from utils.schema import QUERY_METHODS, compile_validator, serialize_response
+from utils.streaming import (STREAM_MEDIA_TYPES, StreamTimeoutError, amaterialize, choose_stream_format,
+                             encode_stream, is_stream, summarize_stream)
 from ui.dashboard import create_ui_blueprint
 
+# Maximum number of sub-requests accepted by a single /batch call
+BATCH_MAX_REQUESTS = 50
+
+# Deadline for route functions without their own timeout_ms
+DEFAULT_TIMEOUT_MS = 30000
+
 
 def create_flask_app():
     """Create and configure the Flask application for the dashboard."""
@@ -44,6 +58,9 @@ def create_flask_app():
     config = load_config(config_path)
     app.config['APP_CONFIG'] = config
 
+    # Shared-memory ring of recent events, readable from every server process
+    configure_event_ring(config.get('run_details', {}).get('event_ring'))
+
     # Register UI blueprint (dashboard)
     ui_blueprint = create_ui_blueprint(config)
     app.register_blueprint(ui_blueprint, url_prefix='/ui')
@@ -82,73 +99,161 @@ def create_fastapi_app(config: dict, flask_app: Flask):
     # Register API routes from config
     register_fastapi_routes(app, config, flask_app)
 
+    # Probe external dependencies in the background for deep health checks
+    app.add_event_handler("startup", lambda: start_dependency_prober(config.get('external_dependencies', {})))
+    app.add_event_handler("shutdown", stop_dependency_prober)
+
     return app
 
 
 def register_fastapi_routes(app: FastAPI, config: dict, flask_app: Flask):
     """Dynamically register API routes from config.json using FastAPI."""
     routes = config.get('api_details', {}).get('routes', {})
+    batch_max_requests = config.get('api_details', {}).get('batch_max_requests', BATCH_MAX_REQUESTS)
+    default_timeout_ms = config.get('api_details', {}).get('default_timeout_ms', DEFAULT_TIMEOUT_MS)
+
+    # Routing table shared by the per-route endpoints and /batch, keyed by (METHOD, route)
+    route_table: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    # Inline, thread and process execution of route functions
+    process_functions = [
+        (route_cfg.get('function_file_relative_path'), route_cfg.get('function'))
+        for route_cfg in routes.values()
+        if route_cfg.get('execution') == 'process'
+    ]
+    executor = RouteExecutor(flask_app, config.get('run_details', {}).get('worker_pools', {}), process_functions)
+    app.add_event_handler("startup", executor.warm_up)
+    app.add_event_handler("shutdown", executor.shutdown)
+
+    async def _dispatch(fn: Callable, route_cfg: dict, query_params: Dict[str, str],
+                        body: Optional[Any], concurrent: bool = False,
+                        stream_format: str = 'json',
+                        validator: Optional[Callable] = None) -> Tuple[Any, int, Optional[bytes]]:
+        """
+        Validate the input, call a route function, log the event and return (response_data, status, body).
+
+        body is the JSON-encoded response; a result that cannot be encoded is
+        replaced by a logged 500 error. Streamed results come back as an
+        encoded chunk iterator (with body None) that logs a summary of the
+        stream once it has been fully sent.
+        """
+        mode = route_cfg.get('execution', 'inline')
+        if concurrent and mode == 'inline':
+            # Inline calls would serialize a batch on the event loop
+            mode = 'thread'
+
+        timeout_ms = route_cfg.get('timeout_ms', default_timeout_ms)
+
+        started = time.perf_counter()
+        # The deadline also covers consuming a streamed result, not just the call returning it
+        deadline = started + timeout_ms / 1000 if timeout_ms else None
+        errors = None
+        logged_output = None
+        if validator is not None:
+            from_query = route_cfg.get('method', 'POST').upper() in QUERY_METHODS
+            errors = validator(query_params if from_query else (body if body is not None else {}))
+        try:
+            if errors:
+                response_data, status = {'success': False, 'error': 'Validation failed', 'details': errors}, 422
+            else:
+                response_data, status = await executor.run(
+                    mode, fn, route_cfg.get('function_file_relative_path'), route_cfg.get('function'),
+                    query_params, body, timeout_ms=timeout_ms
+                )
+            if is_stream(response_data) and concurrent:
+                # Batch results are returned inline, so collect the stream but log only its summary
+                try:
+                    response_data = await amaterialize(response_data, deadline)
+                except StreamTimeoutError:
+                    raise RouteTimeoutError(route_cfg.get('function'), timeout_ms)
+                logged_output = summarize_stream(response_data)
+        except RouteTimeoutError as e:
+            response_data, status = {
+                'success': False,
+                'error': 'Gateway Timeout',
+                'detail': str(e),
+                'timeout_ms': e.timeout_ms,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)
+            }, 504
+        except Exception as e:
+            response_data, status = {'success': False, 'error': str(e)}, 500
+
+        def finish(output_data: Any, success: bool, logged_status: Optional[int] = None) -> None:
+            try:
+                log_event(
+                    route=route_cfg.get('route'),
+                    method=route_cfg.get('method'),
+                    input_data=body or query_params or {},
+                    output_data=output_data,
+                    status=status if logged_status is None else logged_status,
+                    success=success,
+                    duration_ms=(time.perf_counter() - started) * 1000
+                )
+            except Exception as e:
+                # The response is still sent; only its event record is lost
+                print(f"Warning: failed to log event for {route_cfg.get('route')}: {e}")
+
+        if is_stream(response_data):
+            def on_complete(summary: Dict[str, Any], ok: bool) -> None:
+                # The status line has already been sent; a stream cut off at its deadline is logged as a 504
+                finish(summary, ok and 200 <= status < 300, 504 if summary.get('timed_out') else None)
+            return encode_stream(response_data, stream_format, on_complete, deadline), status, None
+
+        try:
+            encoded = serialize_response(response_data)
+        except (TypeError, ValueError) as e:
+            # e.g. a datetime or NaN in the result: report it instead of failing after logging
+            response_data, status = {'success': False, 'error': f'Response is not valid JSON: {e}'}, 500
+            logged_output = None
+            encoded = serialize_response(response_data)
+
+        finish(response_data if logged_output is None else logged_output, status >= 200 and status < 300)
+        return response_data, status, encoded
 
     for route_name, route_config in routes.items():
         route = route_config.get('route')
         method = route_config.get('method', 'POST').upper()
         function_name = route_config.get('function')
         function_file = route_config.get('function_file_relative_path')
+        execution = route_config.get('execution', 'inline')
 
         if not all([route, function_name, function_file]):
             print(f"Warning: Incomplete route config for {route_name}")
             continue
 
-        try:
-            # Import the function
-            module_path = str(PROJECT_ROOT / function_file)
-            spec = __import__('importlib.util').util.spec_from_file_location(
-                f"functions.{function_name}",
-                module_path
-            )
-            module = __import__('importlib.util').util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+        if execution not in EXECUTION_MODES:
+            print(f"Warning: Unknown execution '{execution}' for {route_name}, expected one of {EXECUTION_MODES}")
+            continue
 
-            func = getattr(module, function_name)
+        try:
+            # Import the function (process-mode routes are also pre-imported in the pool workers)
+            func = load_route_function(function_file, function_name)
+
+            # Compile the declared input schema once, at registration
+            validator = compile_validator(route_config.get('input'), from_query=method in QUERY_METHODS)
+            route_table[(method, route)] = {
+                'name': route_name,
+                'config': route_config,
+                'function': func,
+                'validator': validator
+            }
 
-            # Create a wrapper that logs events
-            def create_wrapper(fn, route_cfg):
+            # Create a wrapper that validates input and logs events
+            def create_wrapper(fn, route_cfg, validate):
                 async def wrapper(http_request: Request, body: dict = None):
-                    try:
-                        # Build query string from FastAPI request
-                        from urllib.parse import urlencode
-                        query_params = dict(http_request.query_params)
-                        query_string = urlencode(query_params) if query_params else ""
-
-                        # Call function with Flask app context and query parameters
-                        with flask_app.test_request_context('/?{}'.format(query_string)):
-                            response, status = fn()
-                            # Extract JSON from Flask response
-                            response_data = response.get_json() if hasattr(response, 'get_json') else response
-
-                        log_event(
-                            route=route_cfg.get('route'),
-                            method=route_cfg.get('method'),
-                            input_data=body or query_params or {},
-                            output_data=response_data,
-                            status=status,
-                            success=(status >= 200 and status < 300)
-                        )
-                        return JSONResponse(content=response_data, status_code=status)
-                    except Exception as e:
-                        error_response = {'success': False, 'error': str(e)}
-                        log_event(
-                            route=route_cfg.get('route'),
-                            method=route_cfg.get('method'),
-                            input_data=body or dict(http_request.query_params) or {},
-                            output_data=error_response,
-                            status=500,
-                            success=False
+                    query_params = dict(http_request.query_params)
+                    stream_format = choose_stream_format(route_cfg, http_request.headers.get('accept', ''))
+                    response_data, status, encoded = await _dispatch(
+                        fn, route_cfg, query_params, body, stream_format=stream_format, validator=validate
+                    )
+                    if encoded is None:
+                        return StreamingResponse(
+                            response_data, status_code=status, media_type=STREAM_MEDIA_TYPES[stream_format]
                         )
-                        return JSONResponse(content=error_response, status_code=500)
+                    return Response(content=encoded, status_code=status, media_type='application/json')
                 return wrapper
 
-            wrapper = create_wrapper(func, route_config)
+            wrapper = create_wrapper(func, route_config, validator)
 
             # Register the route based on HTTP method
             if method == 'GET':
@@ -162,11 +267,78 @@ def register_fastapi_routes(app: FastAPI, config: dict, flask_app: Flask):
             elif method == 'PATCH':
                 app.patch(route)(wrapper)
 
-            print(f"Registered FastAPI route: {method} {route} -> {function_name}")
+            print(f"Registered FastAPI route: {method} {route} -> {function_name} ({execution})")
 
         except Exception as e:
             print(f"Error registering route {route_name}: {e}")
 
+    @app.post("/batch")
+    async def batch(http_request: Request):
+        """Execute several configured route calls in one request."""
+        try:
+            payload = await http_request.json()
+        except ValueError:
+            return JSONResponse(content={'success': False, 'error': 'Request body must be JSON'}, status_code=400)
+
+        items = payload.get('requests') if isinstance(payload, dict) else payload
+        if not isinstance(items, list) or not items:
+            return JSONResponse(
+                content={'success': False, 'error': 'Expected a non-empty list of requests'},
+                status_code=400
+            )
+        if len(items) > batch_max_requests:
+            return JSONResponse(
+                content={'success': False, 'error': f'Batch exceeds {batch_max_requests} requests'},
+                status_code=413
+            )
+
+        async def run_item(item: Any) -> Dict[str, Any]:
+            if not isinstance(item, dict):
+                return {'status': 400, 'body': {'success': False, 'error': 'Sub-request must be an object'}}
+
+            route = item.get('route')
+            method = str(item.get('method', 'GET')).upper()
+            if not isinstance(route, str):
+                return {'status': 400, 'body': {'success': False, 'error': 'Sub-request route must be a string'}}
+            if not isinstance(item.get('query'), (dict, type(None))):
+                return {
+                    'route': route,
+                    'method': method,
+                    'status': 400,
+                    'body': {'success': False, 'error': 'Sub-request query must be an object'}
+                }
+
+            entry = route_table.get((method, route))
+            if entry is None:
+                return {
+                    'route': route,
+                    'method': method,
+                    'status': 404,
+                    'body': {'success': False, 'error': f'No route registered for {method} {route}'}
+                }
+
+            query_params = {str(k): str(v) for k, v in (item.get('query') or {}).items()}
+            started = time.perf_counter()
+            # Sub-requests are independent, so run them concurrently off the event loop
+            try:
+                response_data, status, _ = await _dispatch(
+                    entry['function'], entry['config'], query_params, item.get('body'),
+                    concurrent=True, validator=entry['validator']
+                )
+            except Exception as e:
+                # One failing sub-request must not lose the results of the others
+                response_data, status = {'success': False, 'error': str(e)}, 500
+            return {
+                'route': route,
+                'method': method,
+                'status': status,
+                'body': response_data,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 3)
+            }
+
+        results = await asyncio.gather(*(run_item(item) for item in items))
+        return {"success": True, "results": results, "count": len(results)}
+
     # Add built-in routes for events and monitoring
     @app.get("/events")
     async def get_events_json():
@@ -174,6 +346,23 @@ def register_fastapi_routes(app: FastAPI, config: dict, flask_app: Flask):
         events = get_recent_events(limit=100)
         return {"success": True, "events": events, "count": len(events)}
 
+    @app.get("/events/tail")
+    async def get_events_tail(limit: int = 100):
+        """Get the newest compact event records from every server process."""
+        records = read_recent_records(limit=limit)
+        return {"success": True, "events": records, "count": len(records)}
+
+    @app.get("/events/export")
+    async def export_events(since: Optional[str] = None, until: Optional[str] = None):
+        """Stream every stored event in a time range as NDJSON, straight from disk."""
+        try:
+            start, end = parse_event_time(since), parse_event_time(until)
+        except ValueError as e:
+            return JSONResponse(content={'success': False, 'error': f'Invalid time filter: {e}'}, status_code=400)
+
+        lines = (line + '\n' for line in iter_events(since=start, until=end, raw=True))
+        return StreamingResponse(lines, media_type=STREAM_MEDIA_TYPES['ndjson'])
+
     @app.get("/api/get_last_100_api_calls")
     async def get_last_100_api_calls():
         """Get the last 100 API calls (alternate endpoint)."""
@@ -228,6 +417,26 @@ def register_fastapi_routes(app: FastAPI, config: dict, flask_app: Flask):
             "example_curl": "curl http://localhost:8001/events"
         }
 
+        documentation["routes"]["events_tail"] = {
+            "route": "/events/tail",
+            "method": "GET",
+            "function": "get_events_tail",
+            "description": "Get the newest compact event records (route, method, status, timing) from all processes",
+            "input": [{"limit": {"type": "int", "required": False}}],
+            "output": [{"success": {"type": "bool"}, "events": {"type": "list"}, "count": {"type": "int"}}],
+            "example_curl": "curl 'http://localhost:8001/events/tail?limit=50'"
+        }
+
+        documentation["routes"]["events_export"] = {
+            "route": "/events/export",
+            "method": "GET",
+            "function": "export_events",
+            "description": "Stream all stored events as NDJSON, optionally filtered by time (epoch seconds or ISO 8601)",
+            "input": [{"since": {"type": "str", "required": False}, "until": {"type": "str", "required": False}}],
+            "output": [],
+            "example_curl": "curl 'http://localhost:8001/events/export?since=2024-01-01T00:00:00'"
+        }
+
         documentation["routes"]["get_last_100_api_calls"] = {
             "route": "/api/get_last_100_api_calls",
             "method": "GET",
@@ -238,14 +447,27 @@ def register_fastapi_routes(app: FastAPI, config: dict, flask_app: Flask):
             "example_curl": "curl http://localhost:8001/api/get_last_100_api_calls"
         }
 
+        documentation["routes"]["batch"] = {
+            "route": "/batch",
+            "method": "POST",
+            "function": "batch",
+            "description": "Execute several configured route calls concurrently; results are returned in request order",
+            "input": [{"requests": {"type": "list", "required": True}}],
+            "output": [{"success": {"type": "bool"}, "results": {"type": "list"}, "count": {"type": "int"}}],
+            "example_curl": "curl -X POST http://localhost:8001/batch -H 'Content-Type: application/json' "
+                            "-d '{\"requests\": [{\"route\": \"/api/health\", \"method\": \"GET\"}]}'"
+        }
+
         documentation["routes"]["health"] = {
             "route": "/health",
             "method": "GET",
             "function": "health_check",
-            "description": "Health check endpoint - verify server is running",
-            "input": [],
-            "output": [{"success": {"type": "bool"}, "status": {"type": "str"}, "message": {"type": "str"}}],
-            "example_curl": "curl http://localhost:8001/health"
+            "description": "Health check endpoint - verify server is running; "
+                           "deep=true adds cached external dependency probes (503 when degraded)",
+            "input": [{"deep": {"type": "bool", "required": False}}],
+            "output": [{"success": {"type": "bool"}, "status": {"type": "str"}, "message": {"type": "str"},
+                        "dependencies": {"type": "list"}}],
+            "example_curl": "curl 'http://localhost:8001/health?deep=true'"
         }
 
         documentation["routes"]["documentation"] = {
@@ -271,11 +493,27 @@ def register_fastapi_routes(app: FastAPI, config: dict, flask_app: Flask):
         return documentation
 
     @app.get("/health")
-    async def health_check():
-        """Health check endpoint."""
-        return {"success": True, "status": "healthy", "message": "FastAPI Server is running"}
+    async def health_check(deep: bool = False):
+        """Health check endpoint; deep=true adds the cached external dependency state."""
+        if not deep:
+            return {"success": True, "status": "healthy", "message": "FastAPI Server is running"}
+
+        dependency_status = get_dependency_status()
+        healthy = dependency_status['healthy']
+        return JSONResponse(
+            content={
+                "success": healthy,
+                "status": "healthy" if healthy else "degraded",
+                "message": "FastAPI Server is running",
+                "dependencies": dependency_status['dependencies']
+            },
+            status_code=200 if healthy else 503
+        )
 
+    print("Registered FastAPI route: POST /batch -> batch")
     print("Registered FastAPI route: GET /events -> get_events_json")
+    print("Registered FastAPI route: GET /events/tail -> get_events_tail")
+    print("Registered FastAPI route: GET /events/export -> export_events")
     print("Registered FastAPI route: GET /api/get_last_100_api_calls -> get_last_100_api_calls")
     print("Registered FastAPI route: GET /api/documentation -> get_api_documentation")
     print("Registered FastAPI route: GET /get_all_routes -> get_all_routes")
@@ -1,13 +1,17 @@
 """Health check endpoint."""
 
-from flask import jsonify
+from flask import jsonify, request
+
+from utils.dependency_prober import get_dependency_status
 
 
 def health_check() -> tuple:
     """
     Health check endpoint to verify server is running.
 
-    This is a simple endpoint that returns server status.
+    This is a simple endpoint that returns server status. With the query
+    parameter deep=true it also returns the cached state of the external
+    dependencies kept by the background prober, without probing inline.
 
     Returns:
         tuple: (response_dict, status_code)
@@ -15,8 +19,9 @@ def health_check() -> tuple:
         Response format:
         {
             'success': bool,
-            'status': str,
-            'message': str
+            'status': str,               # 'healthy' or 'degraded' (deep mode, 503)
+            'message': str,
+            'dependencies': list         # deep mode only
         }
 
     Examples:
@@ -45,4 +50,12 @@ def health_check() -> tuple:
         'status': 'healthy',
         'message': 'Server is running'
     }
-    return jsonify(response), 200
+    if request.args.get('deep', '').lower() not in ('1', 'true', 'yes'):
+        return jsonify(response), 200
+
+    dependency_status = get_dependency_status()
+    if not dependency_status['healthy']:
+        response['success'] = False
+        response['status'] = 'degraded'
+    response['dependencies'] = dependency_status['dependencies']
+    return jsonify(response), 200 if dependency_status['healthy'] else 503
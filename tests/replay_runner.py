@@ -0,0 +1,270 @@
+"""Traffic replay runner: re-issue recorded events against a server and compare the results."""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from utils.event_logger import iter_events, parse_event_time
+from utils.schema import QUERY_METHODS
+
+# Maximum number of divergence samples kept in the report
+MAX_DIVERGENCE_SAMPLES = 20
+
+
+def load_recorded_events(
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    routes: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Load recorded events in a time window, ordered by their timestamp.
+
+    Args:
+        since (Optional[float]): Only events at or after this epoch time
+        until (Optional[float]): Only events before this epoch time
+        routes (Optional[List[str]]): Only events for these routes
+
+    Returns:
+        List[Dict[str, Any]]: Events with an added 'offset' (seconds since the first event)
+
+    Examples:
+        >>> events = load_recorded_events(routes=['/api/health'])
+        >>> events[0]['offset']
+        0.0
+    """
+    events = []
+    for event in iter_events(since=since, until=until):
+        if routes and event.get('route') not in routes:
+            continue
+        try:
+            event['_recorded_at'] = datetime.fromisoformat(event['timestamp']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            continue
+        events.append(event)
+
+    events.sort(key=lambda e: e['_recorded_at'])
+    if events:
+        first = events[0]['_recorded_at']
+        for event in events:
+            event['offset'] = event.pop('_recorded_at') - first
+    return events
+
+
+def replay_events(
+    events: List[Dict[str, Any]],
+    target: str,
+    speed: float = 1.0,
+    max_throughput: bool = False,
+    concurrency: int = 8,
+    timeout: float = 10.0,
+    ignore_keys: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Re-issue recorded events against a target server.
+
+    Args:
+        events (List[Dict[str, Any]]): Events from load_recorded_events
+        target (str): Base URL of the server, e.g. 'http://localhost:8001'
+        speed (float): Pacing multiplier; 1.0 keeps the original spacing, 2.0 replays twice as fast
+        max_throughput (bool): Ignore the recorded spacing and send as fast as concurrency allows
+        concurrency (int): Maximum number of requests in flight
+        timeout (float): Per-request timeout in seconds
+        ignore_keys (Optional[List[str]]): Top-level output keys left out of the comparison
+
+    Returns:
+        Dict[str, Any]: Replay report with latency distribution and divergences
+
+    Examples:
+        >>> report = replay_events(load_recorded_events(), 'http://localhost:8001', speed=2.0)
+        >>> 'latency_ms' in report
+        True
+    """
+    target = target.rstrip('/')
+    ignore = set(ignore_keys or [])
+    slots = threading.BoundedSemaphore(concurrency)
+    lock = threading.Lock()
+    latencies: List[float] = []
+    report: Dict[str, Any] = {
+        'success': True,
+        'target': target,
+        'mode': 'max_throughput' if max_throughput else f'paced x{speed}',
+        'concurrency': concurrency,
+        'requests': len(events),
+        'errors': 0,
+        'status_divergences': 0,
+        'output_divergences': 0,
+        'divergence_samples': [],
+        'max_schedule_lag_ms': 0.0
+    }
+
+    def record_sample(kind: str, event: Dict[str, Any], detail: Dict[str, Any]) -> None:
+        if len(report['divergence_samples']) < MAX_DIVERGENCE_SAMPLES:
+            report['divergence_samples'].append({
+                'kind': kind,
+                'route': event.get('route'),
+                'method': event.get('method'),
+                'timestamp': event.get('timestamp'),
+                **detail
+            })
+
+    def record_divergence(kind: str, event: Dict[str, Any], detail: Dict[str, Any]) -> None:
+        report[f'{kind}_divergences'] += 1
+        record_sample(kind, event, detail)
+
+    def send(event: Dict[str, Any]) -> None:
+        method = (event.get('method') or 'GET').upper()
+        url = target + event.get('route', '')
+        input_data = event.get('input') or {}
+        # Send the recorded input where the server reads it for this method
+        kwargs = {'params': input_data} if method in QUERY_METHODS else {'json': input_data}
+        try:
+            started = time.perf_counter()
+            response = requests.request(method, url, timeout=timeout, **kwargs)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        except Exception as e:
+            with lock:
+                # Transport failures are counted as errors only, not as status divergences
+                report['errors'] += 1
+                record_sample('error', event, {'recorded': event.get('status'), 'error': str(e)})
+            return
+        finally:
+            slots.release()
+
+        with lock:
+            latencies.append(elapsed_ms)
+            if response.status_code != event.get('status'):
+                record_divergence('status', event, {'recorded': event.get('status'), 'replayed': response.status_code})
+                return
+
+            recorded = event.get('output')
+            if isinstance(recorded, dict) and recorded.get('streamed'):
+                # Only a summary of streamed outputs is recorded
+                return
+            try:
+                replayed = response.json()
+            except ValueError:
+                replayed = response.text
+            if _comparable(recorded, ignore) != _comparable(replayed, ignore):
+                record_divergence('output', event, {'recorded': recorded, 'replayed': replayed})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for event in events:
+            if not max_throughput:
+                due = started + event['offset'] / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            slots.acquire()
+            if not max_throughput:
+                lag_ms = (time.perf_counter() - due) * 1000
+                report['max_schedule_lag_ms'] = max(report['max_schedule_lag_ms'], round(lag_ms, 3))
+            pool.submit(send, event)
+
+    duration = time.perf_counter() - started
+    report['duration_s'] = round(duration, 3)
+    report['throughput_rps'] = round(len(latencies) / duration, 3) if duration > 0 else 0.0
+    report['latency_ms'] = latency_distribution(latencies)
+    report['success'] = report['errors'] == 0 and report['status_divergences'] == 0 \
+        and report['output_divergences'] == 0
+    return report
+
+
+def latency_distribution(latencies: List[float]) -> Dict[str, float]:
+    """
+    Summarize latencies (in ms) as min/mean/percentiles/max.
+
+    Examples:
+        >>> latency_distribution([1.0, 2.0, 3.0, 4.0])['p50']
+        2.0
+    """
+    if not latencies:
+        return {}
+
+    ordered = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        # Nearest-rank percentile
+        index = max(0, min(len(ordered) - 1, int(-(-p * len(ordered) // 100)) - 1))
+        return round(ordered[index], 3)
+
+    return {
+        'count': len(ordered),
+        'min': round(ordered[0], 3),
+        'mean': round(sum(ordered) / len(ordered), 3),
+        'p50': percentile(50),
+        'p90': percentile(90),
+        'p95': percentile(95),
+        'p99': percentile(99),
+        'max': round(ordered[-1], 3)
+    }
+
+
+def _comparable(output: Any, ignore: set) -> Any:
+    """Drop ignored top-level keys from an output before comparing it."""
+    if isinstance(output, dict) and ignore:
+        return {k: v for k, v in output.items() if k not in ignore}
+    return output
+
+
+def run_replay(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Command-line entry point: replay recorded traffic and save the report.
+
+    Examples:
+        python -m tests.replay_runner --target http://localhost:4021 --since 2024-01-01T00:00:00 --speed 2
+        python -m tests.replay_runner --target http://localhost:4021 --max-throughput --concurrency 32
+    """
+    parser = argparse.ArgumentParser(description='Replay recorded events against a server.')
+    parser.add_argument('--target', help='Base URL of the API server (default: from config.json)')
+    parser.add_argument('--since', help='Start of the window (epoch seconds or ISO 8601)')
+    parser.add_argument('--until', help='End of the window (epoch seconds or ISO 8601)')
+    parser.add_argument('--route', action='append', dest='routes', help='Only replay this route (repeatable)')
+    parser.add_argument('--speed', type=float, default=1.0, help='Pacing multiplier (1.0 = original pacing)')
+    parser.add_argument('--max-throughput', action='store_true', help='Send without pacing')
+    parser.add_argument('--concurrency', type=int, default=8, help='Maximum requests in flight')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Per-request timeout in seconds')
+    parser.add_argument('--ignore-key', action='append', dest='ignore_keys',
+                        help='Top-level output key to ignore when comparing (repeatable)')
+    args = parser.parse_args(argv)
+
+    if args.speed <= 0:
+        parser.error('--speed must be positive')
+
+    target = args.target
+    if not target:
+        with open('config.json') as f:
+            run_details = json.load(f).get('run_details', {})
+        api_port = run_details.get('root_port', 8000) + run_details.get('port_offsets', {}).get('api', 1)
+        target = f'http://localhost:{api_port}'
+
+    events = load_recorded_events(parse_event_time(args.since), parse_event_time(args.until), args.routes)
+    report = replay_events(
+        events,
+        target,
+        speed=args.speed,
+        max_throughput=args.max_throughput,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        ignore_keys=args.ignore_keys
+    )
+
+    # Save results
+    results_dir = Path('results')
+    results_dir.mkdir(exist_ok=True)
+    with open(results_dir / 'replay_results.json', 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps({k: v for k, v in report.items() if k != 'divergence_samples'}, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    run_replay()
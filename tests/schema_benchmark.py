@@ -0,0 +1,111 @@
+"""Benchmark compiled schema validators and the response encoding paths."""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Dict, List
+
+from flask import Flask, jsonify
+from starlette.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.schema import _generic_encode, compile_validator, iter_schema_fields, serialize_response
+
+INPUT_SCHEMA = [{
+    'param': {'type': 'str', 'required': True},
+    'count': {'type': 'int', 'required': True},
+    'ratio': {'type': 'float', 'required': False},
+    'enabled': {'type': 'bool', 'required': False},
+    'tags': {'type': 'list', 'required': False}
+}]
+
+REQUEST_BODY = {'param': 'value', 'count': 3, 'ratio': 0.5, 'enabled': True, 'tags': ['a', 'b']}
+
+RESPONSE = {
+    'success': True,
+    'status': 'healthy',
+    'message': 'Server is running',
+    'count': 42,
+    'items': [{'id': i, 'name': f'item-{i}'} for i in range(5)]
+}
+
+
+def _interpreted_validate(schema: List[Dict[str, Any]], data: Dict[str, Any]) -> List[str]:
+    """Reference validator that walks the schema on every call."""
+    types = {'str': str, 'int': int, 'float': (int, float), 'bool': bool, 'list': list, 'dict': dict}
+    errors = []
+    for name, spec in iter_schema_fields(schema):
+        if name not in data:
+            if spec.get('required'):
+                errors.append(f'{name}: required field is missing')
+            continue
+        expected = types.get(spec.get('type'))
+        if expected and not isinstance(data[name], expected):
+            errors.append(f'{name}: expected {spec.get("type")}')
+    return errors
+
+
+def run_benchmark(number: int = 20000) -> Dict[str, Any]:
+    """
+    Time the response and validation paths and return microseconds per call.
+
+    Paths compared:
+    - current: jsonify() in the function, get_json() in the wrapper, JSONResponse re-encode
+    - from_flask: jsonify() in the function, get_json(), serialize_response()
+    - from_dict: function returns a dict, serialize_response() only
+    - prebuilt_generic_encoder: the shared encoder serialize_response() wraps (baseline)
+    - generic_json_dumps: json.dumps(), which builds a new encoder per call
+
+    Examples:
+        >>> results = run_benchmark(number=1000)
+        >>> results['serialize_us']['from_dict'] < results['serialize_us']['current']
+        True
+    """
+    flask_app = Flask(__name__)
+    validate = compile_validator(INPUT_SCHEMA)
+
+    def current_path() -> bytes:
+        with flask_app.app_context():
+            data = jsonify(RESPONSE).get_json()
+        return JSONResponse(content=data).body
+
+    def from_flask() -> bytes:
+        with flask_app.app_context():
+            data = jsonify(RESPONSE).get_json()
+        return serialize_response(data)
+
+    def from_dict() -> bytes:
+        return serialize_response(RESPONSE)
+
+    # Same bytes from the same data; jsonify sorts keys, so the dict path only matches once parsed
+    assert current_path() == from_flask()
+    assert json.loads(from_dict()) == json.loads(current_path())
+    assert validate(REQUEST_BODY) == _interpreted_validate(INPUT_SCHEMA, REQUEST_BODY) == []
+
+    def per_call_us(fn) -> float:
+        return round(min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6, 3)
+
+    results = {
+        'iterations': number,
+        'serialize_us': {
+            'current': per_call_us(current_path),
+            'from_flask': per_call_us(from_flask),
+            'from_dict': per_call_us(from_dict),
+            'prebuilt_generic_encoder': per_call_us(lambda: _generic_encode(RESPONSE).encode('utf-8')),
+            'generic_json_dumps': per_call_us(
+                lambda: json.dumps(RESPONSE, ensure_ascii=False, allow_nan=False,
+                                   separators=(',', ':')).encode('utf-8')
+            )
+        },
+        'validate_us': {
+            'interpreted': per_call_us(lambda: _interpreted_validate(INPUT_SCHEMA, REQUEST_BODY)),
+            'compiled': per_call_us(lambda: validate(REQUEST_BODY))
+        }
+    }
+    return results
+
+
+if __name__ == '__main__':
+    print(json.dumps(run_benchmark(), indent=2))
@@ -1,16 +1,26 @@
 """Dashboard UI routes and logic."""
 
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, Response, current_app, render_template, jsonify, request
 from pathlib import Path
-from typing import Dict, Any
+from typing import Callable, Dict, Any
 from utils.event_logger import get_recent_events
+from utils.event_ring import read_recent_records
+import hashlib
 import json
+import threading
 
 
 def create_ui_blueprint(config: Dict[str, Any]) -> Blueprint:
     """
     Create the UI blueprint for dashboard pages.
 
+    Pages and the config JSON depend only on the configuration, so they are
+    rendered once per config version and served from memory with an ETag.
+    The version is taken from the config the server runs with
+    (app.config['APP_CONFIG'], falling back to `config`), so the dashboard
+    never shows settings the API did not start with; replacing that config
+    drops the cached renders.
+
     Args:
         config (Dict[str, Any]): Server configuration
 
@@ -24,21 +34,51 @@ def create_ui_blueprint(config: Dict[str, Any]) -> Blueprint:
     """
     ui = Blueprint('ui', __name__, template_folder='../templates', static_folder='../static')
 
+    # (config, version, rendered entries) is swapped as one tuple so that a
+    # request never pairs one config version with another version's entries
+    cache: Dict[str, Any] = {'state': (config, _config_version(config), {})}
+    cache_lock = threading.Lock()
+
+    def _current_state() -> tuple:
+        """Return (config, version, entries) for the config the server is running with."""
+        current = current_app.config.get('APP_CONFIG', config)
+        state = cache['state']
+        if state[0] is not current:
+            with cache_lock:
+                state = cache['state']
+                if state[0] is not current:
+                    state = cache['state'] = (current, _config_version(current), {})
+        return state
+
+    def _cached(key: str, mimetype: str, build: Callable[[Dict[str, Any]], str]) -> Response:
+        """Serve a config-derived body from the cache, building it once per config version."""
+        current, version, entries = _current_state()
+        body = entries.get(key)
+        if body is None:
+            body = entries[key] = build(current)
+
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(f'{key}-{version}')
+        # Let browsers keep the page but revalidate it against the ETag
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
     @ui.route('/')
     def main():
         """Main dashboard page."""
-        return render_template('main.html', config=config)
+        return _cached('main', 'text/html', lambda cfg: render_template('main.html', config=cfg))
 
     @ui.route('/events')
     def events():
         """Server events page showing recent requests/responses."""
-        return render_template('events.html', config=config)
+        return _cached('events', 'text/html', lambda cfg: render_template('events.html', config=cfg))
 
     @ui.route('/api-docs')
     def api_docs():
         """Interactive API documentation page."""
-        routes = config.get('api_details', {}).get('routes', {})
-        return render_template('api_docs.html', routes=routes, config=config)
+        return _cached('api-docs', 'text/html', lambda cfg: render_template(
+            'api_docs.html', routes=cfg.get('api_details', {}).get('routes', {}), config=cfg
+        ))
 
     @ui.route('/api/events')
     def get_events():
@@ -46,10 +86,18 @@ def create_ui_blueprint(config: Dict[str, Any]) -> Blueprint:
         events = get_recent_events(limit=100)
         return jsonify({'success': True, 'events': events}), 200
 
+    @ui.route('/api/events/tail')
+    def get_events_tail():
+        """API endpoint to get compact recent events from every server process."""
+        limit = request.args.get('limit', 100, type=int)
+        events = read_recent_records(limit=limit)
+        return jsonify({'success': True, 'events': events}), 200
+
     @ui.route('/api/config')
     def get_config():
         """API endpoint to get server configuration."""
-        return jsonify({'success': True, 'config': config}), 200
+        return _cached('config', 'application/json',
+                       lambda cfg: current_app.json.dumps({'success': True, 'config': cfg}))
 
     @ui.route('/api/fastapi-source')
     def get_fastapi_source():
@@ -81,7 +129,7 @@ def create_ui_blueprint(config: Dict[str, Any]) -> Blueprint:
     @ui.route('/bist')
     def bist_dashboard():
         """BIST dashboard page."""
-        return render_template('bist.html', config=config)
+        return _cached('bist', 'text/html', lambda cfg: render_template('bist.html', config=cfg))
 
     @ui.route('/api/bist-results')
     def get_bist_results():
@@ -110,6 +158,13 @@ def create_ui_blueprint(config: Dict[str, Any]) -> Blueprint:
     @ui.route('/docs')
     def docs():
         """Documentation manager page with folder dropdown and refresh."""
-        return render_template('docs.html', config=config)
+        return _cached('docs', 'text/html', lambda cfg: render_template('docs.html', config=cfg))
 
     return ui
+
+
+def _config_version(config: Dict[str, Any]) -> str:
+    """Short content hash identifying a config version."""
+    encoded = json.dumps(config, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
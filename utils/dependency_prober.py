@@ -0,0 +1,193 @@
+"""Background prober for external dependencies with cached results."""
+
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import requests
+
+DEFAULT_PROBE_SETTINGS = {
+    'probe_interval_seconds': 30,
+    'probe_timeout_seconds': 5,
+    'max_backoff_seconds': 300
+}
+
+# Relative jitter applied to every probe delay (0.2 = +/-20%)
+PROBE_JITTER = 0.2
+
+_prober: Optional['DependencyProber'] = None
+_prober_lock = threading.Lock()
+
+
+class DependencyProber:
+    """
+    Probe each enabled external dependency on its own interval in the background.
+
+    Failures back off exponentially (with jitter) up to max_backoff_seconds. A
+    dependency with a 'circuit_breaker' setting opens its circuit after
+    failure_threshold consecutive failures, stops probing for reset_seconds,
+    then lets a single half-open probe decide whether to close it again.
+
+    Args:
+        dependencies (Dict[str, Any]): The 'external_dependencies' section of config.json
+
+    Examples:
+        >>> prober = DependencyProber({'api': {'enabled': True, 'url': 'https://example.com'}})
+        >>> prober.start()
+        >>> prober.snapshot()['dependencies'][0]['dependency']
+        'api'
+    """
+
+    def __init__(self, dependencies: Dict[str, Any]):
+        self.dependencies = {
+            name: {**DEFAULT_PROBE_SETTINGS, **dep_config}
+            for name, dep_config in (dependencies or {}).items()
+            if dep_config.get('enabled', False)
+        }
+        self._state: Dict[str, Dict[str, Any]] = {
+            name: {
+                'dependency': name,
+                'url': dep_config.get('url'),
+                'success': None,
+                'status': None,
+                'latency_ms': None,
+                'checked_at': None,
+                'consecutive_failures': 0,
+                'circuit': 'closed'
+            }
+            for name, dep_config in self.dependencies.items()
+        }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Start one daemon probe thread per enabled dependency."""
+        for name in self.dependencies:
+            thread = threading.Thread(target=self._run, args=(name,), name=f'probe-{name}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Stop all probe threads."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
+
+    def _run(self, name: str) -> None:
+        while not self._stop.is_set():
+            delay = self.probe(name)
+            self._stop.wait(delay * random.uniform(1 - PROBE_JITTER, 1 + PROBE_JITTER))
+
+    def probe(self, name: str) -> float:
+        """
+        Probe one dependency now, update its cached state and return the delay before the next probe.
+
+        Args:
+            name (str): Dependency name
+
+        Returns:
+            float: Seconds to wait before probing again (before jitter)
+        """
+        dep_config = self.dependencies[name]
+        breaker = dep_config.get('circuit_breaker')
+
+        with self._lock:
+            state = self._state[name]
+            if state['circuit'] == 'open':
+                state['circuit'] = 'half_open'
+
+        result: Dict[str, Any] = {}
+        started = time.perf_counter()
+        try:
+            response = requests.head(dep_config.get('url'), timeout=dep_config['probe_timeout_seconds'])
+            result['status'] = response.status_code
+            result['success'] = 200 <= response.status_code < 300
+        except Exception as e:
+            result['status'] = 0
+            result['success'] = False
+            result['error'] = str(e)
+        result['latency_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        result['checked_at'] = datetime.utcnow().isoformat()
+
+        with self._lock:
+            state = self._state[name]
+            state.pop('error', None)
+            state.update(result)
+
+            if result['success']:
+                state['consecutive_failures'] = 0
+                state['circuit'] = 'closed'
+                return dep_config['probe_interval_seconds']
+
+            state['consecutive_failures'] += 1
+            if breaker and (state['circuit'] == 'half_open'
+                            or state['consecutive_failures'] >= breaker.get('failure_threshold', 3)):
+                state['circuit'] = 'open'
+                return breaker.get('reset_seconds', 60)
+
+            if state['circuit'] == 'half_open':
+                state['circuit'] = 'closed'
+            backoff = dep_config['probe_interval_seconds'] * 2 ** (state['consecutive_failures'] - 1)
+            return min(backoff, dep_config['max_backoff_seconds'])
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the cached state of every probed dependency.
+
+        Returns:
+            Dict[str, Any]: {'healthy': bool, 'dependencies': [state, ...]}
+        """
+        with self._lock:
+            states = [dict(state) for state in self._state.values()]
+        # Dependencies not probed yet do not count as failures
+        healthy = all(state['success'] is not False and state['circuit'] != 'open' for state in states)
+        return {'healthy': healthy, 'dependencies': states}
+
+
+def start_dependency_prober(dependencies: Dict[str, Any]) -> DependencyProber:
+    """
+    Start the process-wide background prober (restarting it if already running).
+
+    Args:
+        dependencies (Dict[str, Any]): The 'external_dependencies' section of config.json
+
+    Returns:
+        DependencyProber: The running prober
+    """
+    global _prober
+    with _prober_lock:
+        if _prober is not None:
+            _prober.stop()
+        _prober = DependencyProber(dependencies)
+        _prober.start()
+        return _prober
+
+
+def stop_dependency_prober() -> None:
+    """Stop the process-wide background prober."""
+    global _prober
+    with _prober_lock:
+        if _prober is not None:
+            _prober.stop()
+            _prober = None
+
+
+def get_dependency_status() -> Dict[str, Any]:
+    """
+    Get the cached dependency state without probing inline.
+
+    Returns:
+        Dict[str, Any]: {'healthy': bool, 'dependencies': [state, ...]}
+
+    Examples:
+        >>> get_dependency_status()['healthy']
+        True
+    """
+    prober = _prober
+    if prober is None:
+        return {'healthy': True, 'dependencies': []}
+    return prober.snapshot()
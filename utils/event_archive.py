@@ -0,0 +1,433 @@
+"""Columnar archive format for closed periods of events.
+
+One archive file holds one UTC day of events, sorted by time:
+
+    MAGIC | u32 manifest length | manifest (JSON) | scalar columns | payload column
+
+Scalar columns are packed arrays (integer timestamps in microseconds,
+dictionary-encoded route and method ids, status, success, duration, and the
+timestamp of the event file each row came from). The
+payload column is NDJSON with each event's input, output and any other
+fields, zlib-compressed in independent blocks of PAYLOAD_BLOCK_ROWS rows, so
+reading a few rows (e.g. the newest ones) decompresses only their blocks. Scans and aggregates run over the scalar columns with
+C-level iteration (bisect, map, itertools.compress, Counter), so payloads
+are only decompressed when full events are requested.
+"""
+
+import argparse
+import json
+import math
+import operator
+import os
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from itertools import compress
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+MAGIC = b'EVCOL01\n'
+ARCHIVE_VERSION = 1
+ARCHIVE_SUFFIX = '.evc'
+
+# Column name -> array typecode
+SCALAR_COLUMNS = (
+    ('timestamp_us', 'q'),
+    ('route_id', 'H'),
+    ('method_id', 'B'),
+    ('status', 'H'),
+    ('success', 'B'),
+    ('duration_ms', 'f'),
+    ('source_ts', 'd')
+)
+
+# Event fields stored in scalar columns; everything else goes to the payload column
+SCALAR_FIELDS = ('timestamp', 'route', 'method', 'status', 'success', 'duration_ms')
+
+# Rows per independently compressed block of the payload column
+PAYLOAD_BLOCK_ROWS = 1024
+
+
+def event_time_us(event: Dict[str, Any]) -> int:
+    """Epoch microseconds of an event's 'timestamp', on the same clock as event file names."""
+    return round(datetime.fromisoformat(event['timestamp']).timestamp() * 1_000_000)
+
+
+def _format_time_us(timestamp_us: int) -> str:
+    """Inverse of event_time_us: rebuild the event's 'timestamp' string."""
+    seconds, micros = divmod(timestamp_us, 1_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=micros).isoformat()
+
+
+def period_bounds(period: str) -> Tuple[float, float]:
+    """Epoch seconds [start, end) of a 'YYYY-MM-DD' period, on the event file name clock."""
+    start = datetime.fromisoformat(period).timestamp()
+    return start, start + 86400
+
+
+def write_archive(path: Path, period: str, events: List[Dict[str, Any]],
+                  sources: Optional[List[float]] = None) -> Dict[str, Any]:
+    """
+    Write events to a columnar archive file (atomically replacing any existing file).
+
+    Args:
+        path (Path): Archive file to write
+        period (str): Period the events belong to ('YYYY-MM-DD')
+        events (List[Dict[str, Any]]): Event dictionaries as written by log_event
+        sources (Optional[List[float]]): Timestamp in the event file name of each
+            event, parallel to events (default: the event's own timestamp)
+
+    Returns:
+        Dict[str, Any]: The archive manifest
+
+    Examples:
+        >>> manifest = write_archive(Path('storage/events_archive/2024-01-01.evc'), '2024-01-01', events)
+        >>> manifest['count'] == len(events)
+        True
+    """
+    if sources is None:
+        sources = [event_time_us(event) / 1_000_000 for event in events]
+    rows = sorted(zip(map(event_time_us, events), sources, events), key=lambda row: row[0])
+
+    routes: Dict[str, int] = {}
+    methods: Dict[str, int] = {}
+    columns = {name: array(typecode) for name, typecode in SCALAR_COLUMNS}
+    payload_lines: List[bytes] = []
+
+    for timestamp_us, source, event in rows:
+        route = event.get('route') or ''
+        method = event.get('method') or ''
+        duration_ms = event.get('duration_ms')
+        columns['timestamp_us'].append(timestamp_us)
+        columns['route_id'].append(routes.setdefault(route, len(routes)))
+        columns['method_id'].append(methods.setdefault(method, len(methods)))
+        columns['status'].append(int(event.get('status') or 0))
+        columns['success'].append(1 if event.get('success') else 0)
+        columns['duration_ms'].append(float('nan') if duration_ms is None else duration_ms)
+        columns['source_ts'].append(source)
+
+        payload = {key: value for key, value in event.items() if key not in SCALAR_FIELDS}
+        payload_lines.append((json.dumps(payload) + '\n').encode('utf-8'))
+
+    payload_blocks = [
+        zlib.compress(b''.join(payload_lines[start:start + PAYLOAD_BLOCK_ROWS]), 6)
+        for start in range(0, len(payload_lines), PAYLOAD_BLOCK_ROWS)
+    ]
+    payload_bytes = b''.join(payload_blocks)
+
+    manifest: Dict[str, Any] = {
+        'version': ARCHIVE_VERSION,
+        'period': period,
+        'count': len(rows),
+        'byteorder': sys.byteorder,
+        'routes': list(routes),
+        'methods': list(methods),
+        'columns': {},
+        'payload': {'codec': 'zlib', 'format': 'ndjson', 'block_rows': PAYLOAD_BLOCK_ROWS, 'blocks': []}
+    }
+    blobs = []
+    offset = 0
+    for name, typecode in SCALAR_COLUMNS:
+        blob = columns[name].tobytes()
+        manifest['columns'][name] = {'typecode': typecode, 'offset': offset, 'length': len(blob)}
+        blobs.append(blob)
+        offset += len(blob)
+    manifest['payload'].update({'offset': offset, 'length': len(payload_bytes)})
+    # [offset, length] of each block, relative to the start of the payload column
+    block_offset = 0
+    for block in payload_blocks:
+        manifest['payload']['blocks'].append([block_offset, len(block)])
+        block_offset += len(block)
+
+    manifest_bytes = json.dumps(manifest).encode('utf-8')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(manifest_bytes).to_bytes(4, 'little'))
+        f.write(manifest_bytes)
+        for blob in blobs:
+            f.write(blob)
+        f.write(payload_bytes)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+class EventArchive:
+    """
+    Reader for one columnar event archive.
+
+    Args:
+        path (Path): Archive file
+
+    Examples:
+        >>> archive = EventArchive(Path('storage/events_archive/2024-01-01.evc'))
+        >>> archive.aggregate(route='/api/health')['error_rate']
+        0.0
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not an event archive: {self.path}")
+            manifest_length = int.from_bytes(f.read(4), 'little')
+            self.manifest = json.loads(f.read(manifest_length))
+            self._data_offset = len(MAGIC) + 4 + manifest_length
+
+        self.period: str = self.manifest['period']
+        self.count: int = self.manifest['count']
+        self.routes: List[str] = self.manifest['routes']
+        self.methods: List[str] = self.manifest['methods']
+        self._route_ids = {route: index for index, route in enumerate(self.routes)}
+        self._method_ids = {method: index for index, method in enumerate(self.methods)}
+        self._columns: Dict[str, array] = {}
+
+    def column(self, name: str) -> array:
+        """Load (once) and return a scalar column as a typed array."""
+        if name not in self._columns:
+            spec = self.manifest['columns'][name]
+            values = array(spec['typecode'])
+            with open(self.path, 'rb') as f:
+                f.seek(self._data_offset + spec['offset'])
+                values.frombytes(f.read(spec['length']))
+            if self.manifest['byteorder'] != sys.byteorder:
+                values.byteswap()
+            self._columns[name] = values
+        return self._columns[name]
+
+    def column_slice(self, name: str, lo: int, hi: int) -> array:
+        """Rows [lo, hi) of a scalar column, reading only those bytes unless the column is already loaded."""
+        if name in self._columns:
+            return self._columns[name][lo:hi]
+        spec = self.manifest['columns'][name]
+        values = array(spec['typecode'])
+        lo, hi = max(lo, 0), max(min(hi, self.count), lo)
+        with open(self.path, 'rb') as f:
+            f.seek(self._data_offset + spec['offset'] + lo * values.itemsize)
+            values.frombytes(f.read((hi - lo) * values.itemsize))
+        if self.manifest['byteorder'] != sys.byteorder:
+            values.byteswap()
+        return values
+
+    def time_range(self, since: Optional[float] = None, until: Optional[float] = None) -> Tuple[int, int]:
+        """Row range [lo, hi) of events with since <= time < until (epoch seconds)."""
+        timestamps = self.column('timestamp_us')
+        lo = 0 if since is None else bisect_left(timestamps, math.ceil(since * 1_000_000))
+        hi = len(timestamps) if until is None else bisect_left(timestamps, math.ceil(until * 1_000_000))
+        return lo, max(lo, hi)
+
+    def _selectors(self, lo: int, hi: int, route: Optional[str],
+                   method: Optional[str]) -> Optional[List[bool]]:
+        """Row mask over [lo, hi) for the route/method filters; None when unfiltered."""
+        selectors = None
+        for value, ids, name in ((route, self._route_ids, 'route_id'), (method, self._method_ids, 'method_id')):
+            if value is None:
+                continue
+            value_id = ids.get(value, -1)
+            mask = list(map(value_id.__eq__, self.column(name)[lo:hi]))
+            selectors = mask if selectors is None else list(map(operator.and_, selectors, mask))
+        return selectors
+
+    def partial_aggregate(self, since: Optional[float] = None, until: Optional[float] = None,
+                          route: Optional[str] = None, method: Optional[str] = None) -> Dict[str, Any]:
+        """Additive counters for aggregate(); combine several with finalize_aggregate()."""
+        lo, hi = self.time_range(since, until)
+        status = self.column('status')[lo:hi]
+        success = self.column('success')[lo:hi]
+        duration = self.column('duration_ms')[lo:hi]
+
+        selectors = self._selectors(lo, hi, route, method)
+        if selectors is not None:
+            status = list(compress(status, selectors))
+            success = list(compress(success, selectors))
+            duration = list(compress(duration, selectors))
+
+        durations = list(filter(math.isfinite, duration))
+        return {
+            'count': len(status),
+            'success_count': sum(success),
+            'status_counts': Counter(status),
+            'duration_sum': math.fsum(durations),
+            'duration_count': len(durations)
+        }
+
+    def aggregate(self, since: Optional[float] = None, until: Optional[float] = None,
+                  route: Optional[str] = None, method: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Count, error rate, status histogram and mean duration, without decoding payloads.
+
+        Args:
+            since (Optional[float]): Only events at or after this epoch time
+            until (Optional[float]): Only events before this epoch time
+            route (Optional[str]): Only events for this route
+            method (Optional[str]): Only events with this HTTP method
+
+        Returns:
+            Dict[str, Any]: Aggregated statistics
+        """
+        return finalize_aggregate([self.partial_aggregate(since, until, route, method)])
+
+    def iter_payloads(self, start: int = 0, stop: Optional[int] = None) -> Iterator[bytes]:
+        """Stream the raw NDJSON payload lines of rows [start, stop), decompressing only their blocks."""
+        stop = self.count if stop is None else min(stop, self.count)
+        spec = self.manifest['payload']
+        block_rows = spec['block_rows']
+
+        with open(self.path, 'rb') as f:
+            for index in range(start // block_rows, -(-stop // block_rows)):
+                block_offset, block_length = spec['blocks'][index]
+                f.seek(self._data_offset + spec['offset'] + block_offset)
+                lines = zlib.decompress(f.read(block_length)).split(b'\n')
+                first_row = index * block_rows
+                yield from lines[max(start - first_row, 0):min(stop - first_row, len(lines) - 1)]
+
+    def iter_events(self, since: Optional[float] = None, until: Optional[float] = None,
+                    raw: bool = False) -> Iterator[Union[Dict[str, Any], str]]:
+        """
+        Rebuild full events in a time range, oldest first.
+
+        Args:
+            since (Optional[float]): Only events at or after this epoch time
+            until (Optional[float]): Only events before this epoch time
+            raw (bool): Yield JSON strings instead of dictionaries
+
+        Yields:
+            Union[Dict[str, Any], str]: Events in the same shape log_event writes
+        """
+        lo, hi = self.time_range(since, until)
+        return self.iter_rows(lo, hi, raw)
+
+    def iter_rows(self, lo: int, hi: int, raw: bool = False) -> Iterator[Union[Dict[str, Any], str]]:
+        """Rebuild the full events of rows [lo, hi), oldest first."""
+        names = ('timestamp_us', 'route_id', 'method_id', 'status', 'success', 'duration_ms')
+        columns = [self.column_slice(name, lo, hi) for name in names]
+        for values, payload in zip(zip(*columns), self.iter_payloads(lo, hi)):
+            timestamp_us, route_id, method_id, status, success, duration_ms = values
+            event = {
+                'timestamp': _format_time_us(timestamp_us),
+                'route': self.routes[route_id],
+                'method': self.methods[method_id]
+            }
+            event.update(json.loads(payload))
+            event['status'] = status
+            event['success'] = bool(success)
+            if math.isfinite(duration_ms):
+                event['duration_ms'] = round(duration_ms, 3)
+            yield json.dumps(event) if raw else event
+
+
+def finalize_aggregate(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine partial_aggregate() results into final statistics."""
+    count = sum(partial['count'] for partial in partials)
+    success_count = sum(partial['success_count'] for partial in partials)
+    status_counts: Counter = Counter()
+    for partial in partials:
+        status_counts.update(partial['status_counts'])
+    duration_count = sum(partial['duration_count'] for partial in partials)
+    duration_sum = math.fsum(partial['duration_sum'] for partial in partials)
+
+    return {
+        'count': count,
+        'success_count': success_count,
+        'error_count': count - success_count,
+        'error_rate': (count - success_count) / count if count else 0.0,
+        'status_counts': {str(status): n for status, n in sorted(status_counts.items())},
+        'avg_duration_ms': round(duration_sum / duration_count, 3) if duration_count else None
+    }
+
+
+def list_archives(archive_dir: Path, since: Optional[float] = None,
+                  until: Optional[float] = None) -> List[Path]:
+    """
+    List archive files whose period overlaps [since, until), oldest first.
+
+    Examples:
+        >>> list_archives(Path('storage/events_archive'))
+        [PosixPath('storage/events_archive/2024-01-01.evc')]
+    """
+    if not archive_dir.exists():
+        return []
+
+    paths = []
+    for path in sorted(archive_dir.glob(f'*{ARCHIVE_SUFFIX}')):
+        try:
+            start, end = period_bounds(path.stem)
+        except ValueError:
+            continue
+        if since is not None and end <= since:
+            continue
+        if until is not None and start >= until:
+            continue
+        paths.append(path)
+    return paths
+
+
+def aggregate_archives(archive_dir: Path, since: Optional[float] = None, until: Optional[float] = None,
+                       route: Optional[str] = None, method: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Aggregate events across all archives overlapping a time range.
+
+    Examples:
+        >>> stats = aggregate_archives(Path('storage/events_archive'), since=1700000000, route='/api/health')
+        >>> 0.0 <= stats['error_rate'] <= 1.0
+        True
+    """
+    partials = [
+        EventArchive(path).partial_aggregate(since, until, route, method)
+        for path in list_archives(archive_dir, since, until)
+    ]
+    return finalize_aggregate(partials)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command-line tooling for event archives.
+
+    Examples:
+        python -m utils.event_archive compact
+        python -m utils.event_archive stats --since 2024-01-01 --route /api/health
+        python -m utils.event_archive dump 2024-01-01 > events.ndjson
+        python -m utils.event_archive expand 2024-01-01
+    """
+    from utils.event_logger import ARCHIVE_DIR, compact_events, expand_archive, parse_event_time
+
+    parser = argparse.ArgumentParser(description='Manage columnar event archives.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    compact_parser = commands.add_parser('compact', help='Archive closed days of event files')
+    compact_parser.add_argument('--before', help='Archive days before this date (default: today, UTC)')
+
+    stats_parser = commands.add_parser('stats', help='Aggregate archived events')
+    stats_parser.add_argument('--since', help='Epoch seconds or ISO 8601')
+    stats_parser.add_argument('--until', help='Epoch seconds or ISO 8601')
+    stats_parser.add_argument('--route')
+    stats_parser.add_argument('--method')
+
+    dump_parser = commands.add_parser('dump', help='Print the events of one archive as NDJSON')
+    dump_parser.add_argument('period', help='YYYY-MM-DD')
+
+    expand_parser = commands.add_parser('expand', help='Convert one archive back to event files')
+    expand_parser.add_argument('period', help='YYYY-MM-DD')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compact':
+        print(json.dumps(compact_events(before=args.before), indent=2))
+    elif args.command == 'stats':
+        stats = aggregate_archives(
+            ARCHIVE_DIR, parse_event_time(args.since), parse_event_time(args.until), args.route, args.method
+        )
+        print(json.dumps(stats, indent=2))
+    elif args.command == 'dump':
+        for line in EventArchive(ARCHIVE_DIR / f'{args.period}{ARCHIVE_SUFFIX}').iter_events(raw=True):
+            print(line)
+    elif args.command == 'expand':
+        print(json.dumps({'period': args.period, 'events': expand_archive(args.period)}))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,17 @@
 """Event logging utility for server requests and responses."""
 
+import heapq
 import json
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from utils.event_archive import ARCHIVE_SUFFIX, EventArchive, list_archives, write_archive
+from utils.event_ring import record_event
+
+EVENTS_DIR = Path('storage/events')
+ARCHIVE_DIR = Path('storage/events_archive')
 
 
 def log_event(
@@ -13,7 +20,8 @@ def log_event(
     input_data: Dict[str, Any],
     output_data: Dict[str, Any],
     status: int,
-    success: bool
+    success: bool,
+    duration_ms: Optional[float] = None
 ) -> None:
     """
     Log an API event (request/response).
@@ -25,6 +33,7 @@ def log_event(
         output_data (Dict): Response output data
         status (int): HTTP status code
         success (bool): Whether the request was successful
+        duration_ms (Optional[float]): Time spent handling the request, in milliseconds
 
     Examples:
         >>> log_event(
@@ -45,15 +54,31 @@ def log_event(
         'status': status,
         'success': success
     }
-
-    # Create events directory if it doesn't exist
-    events_dir = Path('storage/events')
-    events_dir.mkdir(parents=True, exist_ok=True)
+    if duration_ms is not None:
+        event['duration_ms'] = round(duration_ms, 3)
 
     # Save event to file
-    event_file = events_dir / f"{datetime.utcnow().timestamp()}.json"
-    with open(event_file, 'w') as f:
-        json.dump(event, f)
+    _write_event_file(event, datetime.utcnow().timestamp())
+
+    # Publish a compact copy to the shared recent-events ring for other processes
+    record_event(route, method, status, success, duration_ms)
+
+
+def _write_event_file(event: Dict[str, Any], file_timestamp: float) -> None:
+    """Write one event file named after its timestamp, creating the events directory if needed."""
+    EVENTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Encode first so an unserializable event never leaves a truncated file behind
+    encoded = json.dumps(event)
+
+    # Concurrent calls (e.g. /batch) may share a timestamp, so never overwrite an existing event file
+    while True:
+        try:
+            with open(EVENTS_DIR / f"{file_timestamp}.json", 'x') as f:
+                f.write(encoded)
+            return
+        except FileExistsError:
+            file_timestamp += 0.000001
 
 
 def get_recent_events(limit: int = 100) -> list:
@@ -71,19 +96,221 @@ def get_recent_events(limit: int = 100) -> list:
         >>> len(events)
         10
     """
-    events_dir = Path('storage/events')
-    if not events_dir.exists():
-        return []
-
     events = []
-    event_files = sorted(events_dir.glob('*.json'), reverse=True)[:limit]
+    if EVENTS_DIR.exists():
+        # Only the newest `limit` file names are kept, however many events are stored
+        with os.scandir(EVENTS_DIR) as entries:
+            names = heapq.nlargest(limit, (entry.name for entry in entries if entry.name.endswith('.json')))
 
-    for event_file in event_files:
-        try:
-            with open(event_file, 'r') as f:
-                event = json.load(f)
-                events.append(event)
-        except (json.JSONDecodeError, IOError):
-            continue
+        for name in names:
+            try:
+                with open(EVENTS_DIR / name, 'r') as f:
+                    event = json.load(f)
+                    events.append(event)
+            except (json.JSONDecodeError, IOError):
+                continue
+
+    # Top up from the newest archives when recent days have been compacted
+    for archive_path in reversed(list_archives(ARCHIVE_DIR)):
+        if len(events) >= limit:
+            break
+        archive = EventArchive(archive_path)
+        needed = limit - len(events)
+        archived = list(archive.iter_rows(max(0, archive.count - needed), archive.count))
+        events.extend(reversed(archived))
 
     return events
+
+
+def parse_event_time(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a time filter given as epoch seconds or an ISO 8601 timestamp.
+
+    Naive ISO timestamps are read the same way event file names are produced,
+    so they line up with the 'timestamp' field of logged events.
+
+    Args:
+        value (Optional[str]): Epoch seconds or ISO 8601 string, or None
+
+    Returns:
+        Optional[float]: Epoch seconds, or None when no value was given
+
+    Raises:
+        ValueError: If the value is neither a number nor an ISO timestamp
+
+    Examples:
+        >>> parse_event_time('1700000000')
+        1700000000.0
+        >>> parse_event_time(None) is None
+        True
+    """
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def iter_events(
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    raw: bool = False
+) -> Iterator[Union[Dict[str, Any], str]]:
+    """
+    Iterate over all stored events within a time range using constant memory.
+
+    Archived periods come first, oldest first and decompressed incrementally.
+    Event files follow, read one at a time in directory order; the time range
+    is applied to the file names, so files outside it are never opened.
+
+    Args:
+        since (Optional[float]): Only events at or after this epoch time
+        until (Optional[float]): Only events before this epoch time
+        raw (bool): Yield the stored JSON text (validated, one line per event)
+            instead of parsed dictionaries
+
+    Yields:
+        Union[Dict[str, Any], str]: Event dictionaries (or JSON strings if raw)
+
+    Examples:
+        >>> for event in iter_events(since=1700000000):
+        ...     print(event['route'])
+    """
+    for archive_path in list_archives(ARCHIVE_DIR, since, until):
+        yield from EventArchive(archive_path).iter_events(since=since, until=until, raw=raw)
+
+    if not EVENTS_DIR.exists():
+        return
+
+    with os.scandir(EVENTS_DIR) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                file_timestamp = float(entry.name[:-5])
+            except ValueError:
+                continue
+            if since is not None and file_timestamp < since:
+                continue
+            if until is not None and file_timestamp >= until:
+                continue
+
+            try:
+                with open(entry.path, 'r') as f:
+                    text = f.read()
+                event = json.loads(text)
+            except (json.JSONDecodeError, IOError):
+                # Truncated or corrupt files are skipped in raw mode too
+                continue
+            if not raw:
+                yield event
+            elif '\n' in text.strip():
+                # Keep one event per line for NDJSON consumers
+                yield json.dumps(event)
+            else:
+                yield text.strip()
+
+
+def compact_events(before: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Convert closed days of event files into columnar archives.
+
+    Event files are grouped by UTC day using their file names. Every day
+    before the cutoff is written (merged with any existing archive for that
+    day) to ARCHIVE_DIR/<YYYY-MM-DD>.evc, then its event files are removed.
+    Files that cannot be parsed are left in place.
+
+    The archive records the file each event came from, so re-running after an
+    interrupted compaction only removes files it already holds instead of
+    archiving them twice.
+
+    Args:
+        before (Optional[str]): Compact days before this 'YYYY-MM-DD' date (default: today, UTC)
+
+    Returns:
+        Dict[str, Any]: {'cutoff': str, 'archived': {period: event_count}}
+
+    Examples:
+        >>> compact_events(before='2024-01-02')
+        {'cutoff': '2024-01-02', 'archived': {'2024-01-01': 1234}}
+    """
+    cutoff = before or datetime.utcnow().date().isoformat()
+    result: Dict[str, Any] = {'cutoff': cutoff, 'archived': {}}
+    if not EVENTS_DIR.exists():
+        return result
+
+    # File names are utcnow().timestamp(), so fromtimestamp() gives back the UTC date
+    files_by_period: Dict[str, List[tuple]] = {}
+    with os.scandir(EVENTS_DIR) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                source = float(entry.name[:-5])
+            except ValueError:
+                continue
+            period = datetime.fromtimestamp(source).date().isoformat()
+            if period < cutoff:
+                files_by_period.setdefault(period, []).append((source, entry.path))
+
+    for period, files in sorted(files_by_period.items()):
+        archive_path = ARCHIVE_DIR / f"{period}{ARCHIVE_SUFFIX}"
+        events: List[Dict[str, Any]] = []
+        sources: List[float] = []
+        if archive_path.exists():
+            archive = EventArchive(archive_path)
+            events.extend(archive.iter_events())
+            sources.extend(archive.column('source_ts'))
+        already_archived = set(sources)
+
+        compacted = []
+        for source, path in files:
+            if source not in already_archived:
+                try:
+                    with open(path, 'r') as f:
+                        events.append(json.load(f))
+                except (json.JSONDecodeError, IOError):
+                    continue
+                sources.append(source)
+            compacted.append(path)
+
+        if len(sources) > len(already_archived):
+            write_archive(archive_path, period, events, sources)
+        for path in compacted:
+            os.remove(path)
+        result['archived'][period] = len(compacted)
+
+    return result
+
+
+def expand_archive(period: str) -> int:
+    """
+    Convert an archived period back into individual event files and remove the archive.
+
+    Events get back their original file names; files that already exist are
+    kept, so an interrupted expansion can simply be run again.
+
+    Args:
+        period (str): Archived day, 'YYYY-MM-DD'
+
+    Returns:
+        int: Number of event files written
+
+    Examples:
+        >>> expand_archive('2024-01-01')
+        1234
+    """
+    archive_path = ARCHIVE_DIR / f"{period}{ARCHIVE_SUFFIX}"
+    archive = EventArchive(archive_path)
+    EVENTS_DIR.mkdir(parents=True, exist_ok=True)
+    count = 0
+    for source, event in zip(archive.column('source_ts'), archive.iter_events()):
+        try:
+            with open(EVENTS_DIR / f"{source}.json", 'x') as f:
+                json.dump(event, f)
+        except FileExistsError:
+            continue
+        count += 1
+    os.remove(archive_path)
+    return count
@@ -0,0 +1,265 @@
+"""Shared-memory ring buffer of compact recent-event records.
+
+Every process that logs events owns one lane of a memory-mapped file under
+storage/ and is the only writer of that lane. Each slot is guarded by a
+seqlock counter (odd while a write is in progress), so readers in any process
+can take a consistent, merged snapshot of all lanes straight from the mapping
+without locks and without a system call per event.
+"""
+
+import heapq
+import itertools
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+MAGIC = b'EVRING01'
+
+# magic, lanes, slots_per_lane, record_size
+HEADER = struct.Struct('<8sIII')
+HEADER_SIZE = 64
+
+# pid, records written (monotonic)
+LANE_HEADER = struct.Struct('<IQ')
+LANE_HEADER_SIZE = 64
+
+# seq, timestamp, duration_ms, status, success, method, route
+RECORD = struct.Struct('<QdfHB8s96s')
+RECORD_SIZE = 128
+SEQ = struct.Struct('<Q')
+
+DEFAULT_RING_SETTINGS = {
+    'enabled': True,
+    'path': 'storage/recent_events.ring',
+    'lanes': 16,
+    'slots_per_lane': 1024
+}
+
+# Attempts to re-read a slot that is being written while we read it
+_READ_RETRIES = 3
+
+_settings: Dict[str, Any] = dict(DEFAULT_RING_SETTINGS)
+_ring: Optional['EventRing'] = None
+_ring_lock = threading.Lock()
+
+
+class EventRing:
+    """
+    Memory-mapped ring buffer with one single-writer lane per process.
+
+    Args:
+        path (Path): Ring file location
+        lanes (int): Number of lanes (maximum number of concurrent writer processes)
+        slots_per_lane (int): Records kept per lane
+
+    Examples:
+        >>> ring = EventRing(Path('storage/recent_events.ring'), lanes=4, slots_per_lane=256)
+        >>> ring.append('/api/health', 'GET', 200, True, 1.5)
+        >>> ring.tail(1)[0]['route']
+        '/api/health'
+    """
+
+    def __init__(self, path: Path, lanes: int, slots_per_lane: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(str(path), os.O_RDWR | os.O_CREAT, 0o644)
+
+        # Initialise the file once; an existing ring keeps its own geometry
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, 0)
+        try:
+            header = os.pread(self._fd, HEADER.size, 0)
+            if len(header) == HEADER.size and header[:8] == MAGIC:
+                _, lanes, slots_per_lane, _ = HEADER.unpack(header)
+            else:
+                size = HEADER_SIZE + lanes * (LANE_HEADER_SIZE + slots_per_lane * RECORD_SIZE)
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, lanes, slots_per_lane, RECORD_SIZE), 0)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 0)
+
+        self.lanes = lanes
+        self.slots_per_lane = slots_per_lane
+        self.lane_size = LANE_HEADER_SIZE + slots_per_lane * RECORD_SIZE
+        self._mm = mmap.mmap(self._fd, HEADER_SIZE + lanes * self.lane_size)
+        self._write_lock = threading.Lock()
+        self._lane: Optional[int] = None
+        self._lane_pid: Optional[int] = None
+
+    def _lane_offset(self, lane: int) -> int:
+        return HEADER_SIZE + lane * self.lane_size
+
+    def _claim_lane(self) -> Optional[int]:
+        """Claim a free lane for this process; the lock is released when the process exits."""
+        pid = os.getpid()
+        if self._lane is not None and self._lane_pid == pid:
+            return self._lane
+
+        # Record locks are not inherited across fork, so a child claims its own lane
+        self._lane = None
+        for lane in range(self.lanes):
+            offset = self._lane_offset(lane)
+            try:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+            except OSError:
+                continue
+            _, written = LANE_HEADER.unpack_from(self._mm, offset)
+            LANE_HEADER.pack_into(self._mm, offset, pid, written)
+            self._lane, self._lane_pid = lane, pid
+            break
+        return self._lane
+
+    def append(self, route: str, method: str, status: int, success: bool,
+               duration_ms: Optional[float] = None) -> bool:
+        """
+        Append a compact event record to this process's lane.
+
+        Returns:
+            bool: False if every lane is owned by another live process
+        """
+        with self._write_lock:
+            lane = self._claim_lane()
+            if lane is None:
+                return False
+
+            lane_offset = self._lane_offset(lane)
+            pid, written = LANE_HEADER.unpack_from(self._mm, lane_offset)
+            slot_offset = lane_offset + LANE_HEADER_SIZE + (written % self.slots_per_lane) * RECORD_SIZE
+
+            (seq,) = SEQ.unpack_from(self._mm, slot_offset)
+            seq += 1 if seq % 2 == 0 else 2
+            SEQ.pack_into(self._mm, slot_offset, seq)
+            RECORD.pack_into(
+                self._mm, slot_offset, seq, time.time(),
+                float('nan') if duration_ms is None else duration_ms,
+                status, 1 if success else 0,
+                (method or '').encode('utf-8')[:8], (route or '').encode('utf-8')[:96]
+            )
+            SEQ.pack_into(self._mm, slot_offset, seq + 1)
+            LANE_HEADER.pack_into(self._mm, lane_offset, pid, written + 1)
+            return True
+
+    def _read_lane(self, lane: int, limit: int) -> List[tuple]:
+        """Read up to `limit` of the newest consistent records of a lane."""
+        lane_offset = self._lane_offset(lane)
+        pid, written = LANE_HEADER.unpack_from(self._mm, lane_offset)
+        count = min(written, self.slots_per_lane, limit)
+        slots_offset = lane_offset + LANE_HEADER_SIZE
+
+        records = []
+        for index in range(written - count, written):
+            slot_offset = slots_offset + (index % self.slots_per_lane) * RECORD_SIZE
+            for _ in range(_READ_RETRIES):
+                # The record starts with its counter: consistent if it is even
+                # and still unchanged once the rest of the slot has been read
+                record = RECORD.unpack_from(self._mm, slot_offset)
+                if record[0] % 2 == 0 and SEQ.unpack_from(self._mm, slot_offset)[0] == record[0]:
+                    break
+            else:
+                continue
+            if record[0]:
+                records.append(record + (pid,))
+        return records
+
+    def tail(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Return the newest records across all lanes, newest first.
+
+        Args:
+            limit (int): Maximum number of records to return
+
+        Returns:
+            List[Dict[str, Any]]: Compact event records
+        """
+        records = itertools.chain.from_iterable(self._read_lane(lane, limit) for lane in range(self.lanes))
+        newest = heapq.nlargest(limit, records, key=lambda record: record[1])
+        return [_record_to_dict(record) for record in newest]
+
+
+def _record_to_dict(record: tuple) -> Dict[str, Any]:
+    _, timestamp, duration_ms, status, success, method, route, pid = record
+    return {
+        'timestamp': datetime.utcfromtimestamp(timestamp).isoformat(),
+        'route': route.rstrip(b'\0').decode('utf-8', 'replace'),
+        'method': method.rstrip(b'\0').decode('utf-8', 'replace'),
+        'status': status,
+        'success': bool(success),
+        'duration_ms': None if duration_ms != duration_ms else round(duration_ms, 3),
+        'pid': pid
+    }
+
+
+def configure_event_ring(settings: Optional[Dict[str, Any]]) -> None:
+    """
+    Apply ring settings from config.json (run_details.event_ring).
+
+    Args:
+        settings (Optional[Dict[str, Any]]): Overrides for DEFAULT_RING_SETTINGS
+
+    Examples:
+        >>> configure_event_ring({'lanes': 4, 'slots_per_lane': 4096})
+    """
+    global _ring
+    with _ring_lock:
+        _settings.clear()
+        _settings.update({**DEFAULT_RING_SETTINGS, **(settings or {})})
+        _ring = None
+
+
+def _get_ring() -> Optional[EventRing]:
+    global _ring
+    if fcntl is None or not _settings.get('enabled'):
+        return None
+    if _ring is None:
+        with _ring_lock:
+            if _ring is None:
+                try:
+                    _ring = EventRing(Path(_settings['path']), _settings['lanes'], _settings['slots_per_lane'])
+                except OSError as e:
+                    # The ring is an optional fast path; events are still written to disk
+                    print(f"Warning: event ring disabled: {e}")
+                    _settings['enabled'] = False
+    return _ring
+
+
+def record_event(route: str, method: str, status: int, success: bool,
+                 duration_ms: Optional[float] = None) -> None:
+    """
+    Append a compact record of an event to the shared ring (no-op when disabled).
+
+    Examples:
+        >>> record_event('/api/health', 'GET', 200, True, 1.2)
+    """
+    ring = _get_ring()
+    if ring is not None:
+        ring.append(route, method, status, success, duration_ms)
+
+
+def read_recent_records(limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Get the newest compact event records written by any process, newest first.
+
+    Args:
+        limit (int): Maximum number of records to return
+
+    Returns:
+        list: Records with timestamp, route, method, status, success, duration_ms and pid
+
+    Examples:
+        >>> records = read_recent_records(limit=10)
+        >>> len(records) <= 10
+        True
+    """
+    ring = _get_ring()
+    if ring is None:
+        return []
+    return ring.tail(limit)
@@ -0,0 +1,376 @@
+"""Execution backends (inline, thread pool, process pool) for route functions."""
+
+import asyncio
+import importlib.util
+import inspect
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from collections.abc import AsyncIterator
+from urllib.parse import urlencode
+
+from flask import request as flask_request
+
+from utils.streaming import aiterate_in_context, amaterialize, is_stream, iterate_in_context
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+EXECUTION_MODES = ('inline', 'thread', 'process')
+
+DEFAULT_POOL_SETTINGS = {
+    'thread_pool_size': 8,
+    'process_pool_size': os.cpu_count() or 2,
+    'max_tasks_per_child': 100
+}
+
+# Worker-process state, populated by _init_worker in each pool process
+_worker_flask_app = None
+_worker_functions: Dict[Tuple[str, str], Callable] = {}
+
+
+def load_route_function(function_file: str, function_name: str) -> Callable:
+    """
+    Import a route function from a file path relative to the project root.
+
+    Args:
+        function_file (str): Path of the function module, e.g. 'functions/health.py'
+        function_name (str): Name of the function inside the module
+
+    Returns:
+        Callable: The route function
+
+    Examples:
+        >>> fn = load_route_function('functions/health.py', 'health_check')
+        >>> fn.__name__
+        'health_check'
+    """
+    module_path = str(PROJECT_ROOT / function_file)
+    spec = importlib.util.spec_from_file_location(f"functions.{function_name}", module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, function_name)
+
+
+class RouteTimeoutError(TimeoutError):
+    """Raised when a route function does not finish before its deadline."""
+
+    def __init__(self, function_name: str, timeout_ms: float):
+        super().__init__(f"{function_name} did not finish within {timeout_ms} ms")
+        self.timeout_ms = timeout_ms
+
+
+def _build_request_context(flask_app, query_params: Dict[str, str], body: Optional[Any]):
+    """Build the Flask request context a route function is called in."""
+    query_string = urlencode(query_params) if query_params else ""
+    return flask_app.test_request_context('/?{}'.format(query_string), json=body)
+
+
+def _unpack_result(ctx, result: Any) -> Tuple[Any, int]:
+    """Turn a route function result into (response_data, status); must run inside ctx."""
+    response, status = result if isinstance(result, tuple) else (result, 200)
+
+    if is_stream(response):
+        # Cache the body so the stream can still read it once the context is popped
+        flask_request.get_data()
+        if isinstance(response, AsyncIterator):
+            return aiterate_in_context(ctx, response), status
+        return iterate_in_context(ctx, response), status
+
+    # Extract JSON from Flask response
+    response_data = response.get_json() if hasattr(response, 'get_json') else response
+    return response_data, status
+
+
+def call_route_function(flask_app, fn: Callable, query_params: Dict[str, str],
+                        body: Optional[Any]) -> Tuple[Any, int]:
+    """
+    Call a route function inside a Flask request context and return (response_data, status).
+
+    Route functions return (response, status), or a generator / async iterator
+    (optionally paired with a status) whose items are streamed. Streams are
+    returned wrapped so that each step runs inside the request context.
+    """
+    # Call function with Flask app context, query parameters and JSON body
+    ctx = _build_request_context(flask_app, query_params, body)
+    with ctx:
+        return _unpack_result(ctx, fn())
+
+
+async def acall_route_function(flask_app, fn: Callable, query_params: Dict[str, str],
+                               body: Optional[Any]) -> Tuple[Any, int]:
+    """Async counterpart of call_route_function for `async def` route functions."""
+    ctx = _build_request_context(flask_app, query_params, body)
+    with ctx:
+        return _unpack_result(ctx, await fn())
+
+
+def _init_worker(function_specs: List[Tuple[str, str]]) -> None:
+    """Process pool initializer: build a Flask app and pre-import the process-mode functions."""
+    global _worker_flask_app
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+
+    from flask import Flask
+    _worker_flask_app = Flask('route_worker')
+
+    for function_file, function_name in function_specs:
+        _worker_functions[(function_file, function_name)] = load_route_function(function_file, function_name)
+
+
+def _run_in_worker(function_file: str, function_name: str, query_params: Dict[str, str],
+                   body: Optional[Any]) -> Tuple[Any, int, bool]:
+    """
+    Entry point executed inside a pool process; arguments and result are plain JSON data.
+
+    Returns (response_data, status, streamed), where streamed marks collected stream items.
+    """
+    key = (function_file, function_name)
+    if key not in _worker_functions:
+        _worker_functions[key] = load_route_function(function_file, function_name)
+    fn = _worker_functions[key]
+    if inspect.iscoroutinefunction(fn):
+        response_data, status = asyncio.run(acall_route_function(_worker_flask_app, fn, query_params, body))
+    else:
+        response_data, status = call_route_function(_worker_flask_app, fn, query_params, body)
+
+    # Streams cannot cross the process boundary; send the collected items instead
+    streamed = is_stream(response_data)
+    if isinstance(response_data, AsyncIterator):
+        response_data = asyncio.run(amaterialize(response_data))
+    elif streamed:
+        response_data = list(response_data)
+    return response_data, status, streamed
+
+
+def _warm_up_worker() -> None:
+    """No-op task submitted at startup so pool processes are spawned before the first call."""
+
+
+def _terminate_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Shut down a process pool and kill its workers, including any still running a call."""
+    # shutdown() drops the executor's reference to its processes, so take them first
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+class RouteExecutor:
+    """
+    Run route functions inline, on a thread pool, or on a managed process pool.
+
+    Args:
+        flask_app: Flask app providing the request context for inline/thread calls
+        settings (Dict[str, Any]): Pool settings overriding DEFAULT_POOL_SETTINGS
+        process_functions (List[Tuple[str, str]]): (function_file, function_name) pairs
+            pre-imported in every pool process
+
+    Examples:
+        >>> executor = RouteExecutor(flask_app, {'process_pool_size': 2}, [])
+        >>> data, status = await executor.run('thread', fn, 'functions/health.py', 'health_check', {}, None)
+    """
+
+    def __init__(self, flask_app, settings: Dict[str, Any], process_functions: List[Tuple[str, str]]):
+        self.flask_app = flask_app
+        self.settings = {**DEFAULT_POOL_SETTINGS, **(settings or {})}
+        self.process_functions = list(process_functions)
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        # Timed-out calls still occupying a thread of the current thread pool
+        self._abandoned_threads = 0
+        self._thread_pool_lock = threading.Lock()
+        # In-flight calls per process pool, and the timed-out calls of retired pools
+        self._process_calls: Dict[ProcessPoolExecutor, Set[Future]] = {}
+        self._abandoned_processes: Dict[ProcessPoolExecutor, Set[Future]] = {}
+        self._process_pool_lock = threading.Lock()
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        with self._thread_pool_lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self.settings['thread_pool_size'],
+                    thread_name_prefix='route-worker'
+                )
+                self._abandoned_threads = 0
+            return self._thread_pool
+
+    def _abandon_thread_call(self, pool: ThreadPoolExecutor, future: Future) -> None:
+        """
+        Account for a timed-out call that is still running on a pool thread.
+
+        Once abandoned calls hold half of the pool, the pool is retired and new
+        calls (including /batch sub-requests) get a fresh one; the retired
+        pool's threads exit as their calls finish.
+        """
+        if future.done():
+            return
+
+        def release(_: Future) -> None:
+            with self._thread_pool_lock:
+                if self._thread_pool is pool:
+                    self._abandoned_threads -= 1
+
+        with self._thread_pool_lock:
+            if self._thread_pool is not pool:
+                return
+            self._abandoned_threads += 1
+            if self._abandoned_threads * 2 >= self.settings['thread_pool_size']:
+                print(f"Warning: {self._abandoned_threads} timed-out route calls are still running; "
+                      f"replacing the route thread pool")
+                self._thread_pool = None
+                pool.shutdown(wait=False)
+                return
+        future.add_done_callback(release)
+
+    def _abandon_process_call(self, pool: ProcessPoolExecutor, future: Future) -> None:
+        """
+        Retire the process pool running a timed-out call.
+
+        Worker processes can be stopped, unlike threads: new calls go to a
+        fresh pool at once, and the retired pool's workers are terminated as
+        soon as its other in-flight calls have finished.
+        """
+        if future.done():
+            return
+        with self._process_pool_lock:
+            if self._process_pool is pool:
+                self._process_pool = None
+            self._abandoned_processes.setdefault(pool, set()).add(future)
+        print("Warning: a timed-out route call is still running; replacing the route process pool")
+        self._reap_process_pool(pool)
+        self.warm_up()
+
+    def _reap_process_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Terminate a retired pool once only its abandoned calls are left running."""
+        with self._process_pool_lock:
+            abandoned = self._abandoned_processes.get(pool)
+            if abandoned is None or self._process_calls.get(pool, set()) - abandoned:
+                return
+            del self._abandoned_processes[pool]
+            self._process_calls.pop(pool, None)
+        _terminate_process_pool(pool)
+
+    def _process_call_done(self, pool: ProcessPoolExecutor, future: Future) -> None:
+        with self._process_pool_lock:
+            calls = self._process_calls.get(pool)
+            if calls is not None:
+                calls.discard(future)
+        self._reap_process_pool(pool)
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                # spawn rather than fork: the parent runs Flask and uvicorn threads
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.settings['process_pool_size'],
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.process_functions,),
+                    max_tasks_per_child=self.settings['max_tasks_per_child']
+                )
+            return self._process_pool
+
+    async def run(self, mode: str, fn: Callable, function_file: str, function_name: str,
+                  query_params: Dict[str, str], body: Optional[Any],
+                  timeout_ms: Optional[float] = None) -> Tuple[Any, int]:
+        """
+        Execute a route function with the given execution mode and deadline.
+
+        When the deadline passes, async functions are cancelled and calls running
+        on a pool are abandoned (the worker finishes in the background and its
+        result is discarded). Sync functions cannot be interrupted, so in inline
+        mode they only run on the event loop when they have no deadline; with
+        one they run on the thread pool like thread mode.
+
+        Args:
+            mode (str): One of EXECUTION_MODES
+            fn (Callable): Route function (used for inline and thread modes)
+            function_file (str): Module path of the function (used for process mode)
+            function_name (str): Function name (used for process mode)
+            query_params (Dict[str, str]): Query parameters of the call
+            body (Optional[Any]): JSON body of the call
+            timeout_ms (Optional[float]): Deadline in milliseconds, or None for no deadline
+
+        Returns:
+            Tuple[Any, int]: (response_data, status)
+
+        Raises:
+            RouteTimeoutError: If the function misses its deadline
+        """
+        thread_call: Optional[Tuple[ThreadPoolExecutor, Future]] = None
+        process_call: Optional[Tuple[ProcessPoolExecutor, Future]] = None
+        if mode == 'process':
+            process_call = self._submit_to_process_pool(function_file, function_name, query_params, body)
+            call = self._await_process_call(*process_call)
+        elif inspect.iscoroutinefunction(fn):
+            # Async functions run on the event loop in either inline or thread mode
+            call = acall_route_function(self.flask_app, fn, query_params, body)
+        elif mode == 'thread' or timeout_ms:
+            pool = self._get_thread_pool()
+            thread_call = (pool, pool.submit(call_route_function, self.flask_app, fn, query_params, body))
+            call = asyncio.wrap_future(thread_call[1])
+        else:
+            return call_route_function(self.flask_app, fn, query_params, body)
+
+        try:
+            return await asyncio.wait_for(call, timeout=timeout_ms / 1000 if timeout_ms else None)
+        except asyncio.TimeoutError:
+            if not timeout_ms:
+                raise
+            if thread_call is not None:
+                self._abandon_thread_call(*thread_call)
+            if process_call is not None:
+                self._abandon_process_call(*process_call)
+            raise RouteTimeoutError(function_name, timeout_ms)
+
+    def _submit_to_process_pool(self, function_file: str, function_name: str, query_params: Dict[str, str],
+                                body: Optional[Any]) -> Tuple[ProcessPoolExecutor, Future]:
+        """Submit a route function call to the process pool and track it until it finishes."""
+        pool = self._get_process_pool()
+        future = pool.submit(_run_in_worker, function_file, function_name, query_params, body)
+        with self._process_pool_lock:
+            self._process_calls.setdefault(pool, set()).add(future)
+        future.add_done_callback(lambda done: self._process_call_done(pool, done))
+        return pool, future
+
+    async def _await_process_call(self, pool: ProcessPoolExecutor, future: Future) -> Tuple[Any, int]:
+        """Wait for a process pool call to finish and return (response_data, status)."""
+        try:
+            # Cancelling this await also cancels the pool task if it has not started yet
+            response_data, status, streamed = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            # A worker died (e.g. crashed or was killed); start a fresh pool for the next call
+            pool.shutdown(wait=False, cancel_futures=True)
+            with self._process_pool_lock:
+                if self._process_pool is pool:
+                    self._process_pool = None
+            raise
+        # Hand collected stream items back as a stream so they are encoded and logged like one
+        return (iter(response_data) if streamed else response_data), status
+
+    def warm_up(self) -> None:
+        """Start the process pool workers ahead of time when any route uses process mode."""
+        if self.process_functions:
+            pool = self._get_process_pool()
+            for _ in range(self.settings['process_pool_size']):
+                pool.submit(_warm_up_worker)
+
+    def shutdown(self) -> None:
+        """Shut down the thread pool and terminate the process pools, including retired ones."""
+        with self._thread_pool_lock:
+            if self._thread_pool is not None:
+                self._thread_pool.shutdown(wait=False, cancel_futures=True)
+                self._thread_pool = None
+        with self._process_pool_lock:
+            pools = [pool for pool in (self._process_pool, *self._abandoned_processes) if pool is not None]
+            self._process_pool = None
+            self._abandoned_processes.clear()
+            self._process_calls.clear()
+        for pool in pools:
+            _terminate_process_pool(pool)
@@ -0,0 +1,140 @@
+"""Request validators compiled from config.json route schemas, and response encoding.
+
+Route schemas are lists of {field_name: {"type": ..., "required": ...}} dicts,
+as used by the 'input' and 'expected_output' keys of each route. Input schemas
+are compiled once at registration time into plain closures so that no per-call
+work is spent interpreting the schema.
+
+'expected_output' is not used for encoding: serializers specialised per output
+field measured slower than one shared, pre-built encoder (see
+tests/schema_benchmark.py), so every response goes through serialize_response().
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Encoder matching the output of Starlette's JSONResponse.render, built once
+_generic_encode = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode
+
+_QUERY_BOOLEANS = ('true', 'false', '1', '0', 'yes', 'no')
+
+# Methods whose declared input is read from the query string instead of the JSON body
+QUERY_METHODS = ('GET', 'DELETE')
+
+
+def iter_schema_fields(schema: Optional[List[Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Flatten a route schema into (field_name, field_spec) pairs.
+
+    Examples:
+        >>> iter_schema_fields([{'status': {'type': 'str', 'required': True}}])
+        [('status', {'type': 'str', 'required': True})]
+    """
+    fields = []
+    for entry in schema or []:
+        for name, spec in entry.items():
+            fields.append((name, spec if isinstance(spec, dict) else {}))
+    return fields
+
+
+def _body_type_check(type_name: str) -> Optional[Callable[[Any], bool]]:
+    """Return a check for a JSON body value of the given schema type, or None for any type."""
+    if type_name == 'str':
+        return lambda value: type(value) is str
+    if type_name == 'int':
+        return lambda value: type(value) is int
+    if type_name == 'float':
+        return lambda value: type(value) is float or type(value) is int
+    if type_name == 'bool':
+        return lambda value: type(value) is bool
+    if type_name == 'list':
+        return lambda value: type(value) is list
+    if type_name == 'dict':
+        return lambda value: type(value) is dict
+    return None
+
+
+def _query_type_check(type_name: str) -> Optional[Callable[[str], bool]]:
+    """Return a check for a query string value of the given schema type, or None for any type."""
+    def parses_as(cast: Callable[[str], Any]) -> Callable[[str], bool]:
+        def check(value: str) -> bool:
+            try:
+                cast(value)
+                return True
+            except ValueError:
+                return False
+        return check
+
+    if type_name == 'int':
+        return parses_as(int)
+    if type_name == 'float':
+        return parses_as(float)
+    if type_name == 'bool':
+        return lambda value: value.lower() in _QUERY_BOOLEANS
+    return None
+
+
+def compile_validator(input_schema: Optional[List[Dict[str, Any]]],
+                      from_query: bool = False) -> Optional[Callable[[Any], List[str]]]:
+    """
+    Compile a route 'input' schema into a validator function.
+
+    Args:
+        input_schema (Optional[List[Dict[str, Any]]]): The route's 'input' list
+        from_query (bool): Validate query string values (GET/DELETE) instead of a JSON body
+
+    Returns:
+        Optional[Callable[[Any], List[str]]]: Function returning a list of error
+        messages (empty when valid), or None when the schema declares no fields
+
+    Examples:
+        >>> validate = compile_validator([{'param': {'type': 'str', 'required': True}}])
+        >>> validate({})
+        ['param: required field is missing']
+        >>> validate({'param': 'value'})
+        []
+    """
+    fields = iter_schema_fields(input_schema)
+    if not fields:
+        return None
+
+    type_check = _query_type_check if from_query else _body_type_check
+    checks = tuple(
+        (name, bool(spec.get('required', False)), spec.get('type'), type_check(spec.get('type')))
+        for name, spec in fields
+    )
+
+    def validate(data: Any) -> List[str]:
+        if not isinstance(data, dict):
+            return ['request body must be a JSON object']
+        errors = []
+        for name, required, type_name, check in checks:
+            if name not in data:
+                if required:
+                    errors.append(f'{name}: required field is missing')
+                continue
+            if check is not None and not check(data[name]):
+                errors.append(f'{name}: expected {type_name}')
+        return errors
+
+    return validate
+
+
+def serialize_response(data: Any) -> bytes:
+    """
+    Encode response data as JSON with the shared, pre-built encoder.
+
+    The output is byte-for-byte what JSONResponse would produce, without
+    constructing a response object or a new encoder per call.
+
+    Args:
+        data (Any): JSON-serializable response data
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+
+    Examples:
+        >>> serialize_response({'status': 'healthy', 'count': 2})
+        b'{"status":"healthy","count":2}'
+    """
+    return _generic_encode(data).encode('utf-8')
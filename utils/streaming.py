@@ -0,0 +1,247 @@
+"""Streaming helpers for route functions that return generators or async iterators."""
+
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Iterator
+from typing import Any, AsyncIterator as AsyncIteratorType, Callable, Dict, List, Optional
+
+STREAM_FORMATS = ('json', 'ndjson')
+
+STREAM_MEDIA_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson'
+}
+
+# Number of leading items kept in the event log summary of a streamed response
+STREAM_PREVIEW_ITEMS = 5
+
+# Returned by next() in a worker thread when a sync stream is exhausted
+_STREAM_END = object()
+
+
+class StreamTimeoutError(TimeoutError):
+    """Raised when a stream is still producing items at its deadline."""
+
+
+def is_stream(obj: Any) -> bool:
+    """
+    Check whether a route function result should be streamed.
+
+    Args:
+        obj (Any): Response data returned by a route function
+
+    Returns:
+        bool: True for generators, iterators and async iterators
+
+    Examples:
+        >>> is_stream(x for x in range(3))
+        True
+        >>> is_stream({'success': True})
+        False
+    """
+    return isinstance(obj, (Iterator, AsyncIterator))
+
+
+def iterate_in_context(ctx, items: Iterator) -> Iterator:
+    """
+    Iterate a sync iterator with a Flask request context pushed around each step.
+
+    The context is pushed and popped within a single next() call, so the items
+    may be pulled from different threads.
+    """
+    while True:
+        with ctx:
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+        yield item
+
+
+async def aiterate_in_context(ctx, items: AsyncIterator) -> AsyncIteratorType:
+    """Async counterpart of iterate_in_context for async iterators."""
+    while True:
+        with ctx:
+            try:
+                item = await items.__anext__()
+            except StopAsyncIteration:
+                return
+        yield item
+
+
+async def aiterate_with_deadline(items: Any, deadline: Optional[float] = None) -> AsyncIteratorType:
+    """
+    Iterate a sync or async stream without blocking the event loop, up to a deadline.
+
+    Sync iterators are advanced on a worker thread. When time.perf_counter()
+    passes the deadline, an async iterator has its pending step cancelled, a
+    sync one is no longer pulled (a running next() cannot be interrupted),
+    and StreamTimeoutError is raised.
+
+    Args:
+        items (Any): Sync or async iterator
+        deadline (Optional[float]): time.perf_counter() value to stop at, or None
+
+    Yields:
+        Any: The stream's items
+
+    Raises:
+        StreamTimeoutError: If the stream is not exhausted before the deadline
+    """
+    if isinstance(items, AsyncIterator):
+        step = items.__anext__
+    else:
+        loop = asyncio.get_running_loop()
+        step = lambda: loop.run_in_executor(None, next, items, _STREAM_END)  # noqa: E731
+
+    while True:
+        remaining = None if deadline is None else deadline - time.perf_counter()
+        if remaining is not None and remaining <= 0:
+            raise StreamTimeoutError('stream did not finish before its deadline')
+        try:
+            item = await asyncio.wait_for(step(), remaining)
+        except StopAsyncIteration:
+            return
+        except asyncio.TimeoutError:
+            raise StreamTimeoutError('stream did not finish before its deadline') from None
+        if item is _STREAM_END:
+            return
+        yield item
+
+
+async def amaterialize(items: Any, deadline: Optional[float] = None) -> List[Any]:
+    """
+    Collect a sync or async stream into a list without blocking the event loop.
+
+    Raises:
+        StreamTimeoutError: If the stream is not exhausted before the deadline
+    """
+    return [item async for item in aiterate_with_deadline(items, deadline)]
+
+
+def summarize_stream(items: List[Any], fmt: str = 'json') -> Dict[str, Any]:
+    """
+    Build the bounded event log summary of a stream that was collected instead of sent.
+
+    The summary matches what encode_stream reports for the same items.
+
+    Args:
+        items (List[Any]): Collected stream items
+        fmt (str): 'json' or 'ndjson'
+
+    Returns:
+        Dict[str, Any]: {'streamed', 'format', 'items', 'bytes', 'preview'}
+
+    Examples:
+        >>> summarize_stream([1, 2, 3])
+        {'streamed': True, 'format': 'json', 'items': 3, 'bytes': 7, 'preview': [1, 2, 3]}
+    """
+    encoded = [json.dumps(item) for item in items]
+    if fmt == 'ndjson':
+        size = sum(len(chunk) + 1 for chunk in encoded)
+    else:
+        size = 2 + sum(len(chunk) for chunk in encoded) + max(len(encoded) - 1, 0)
+    return {
+        'streamed': True,
+        'format': fmt,
+        'items': len(items),
+        'bytes': size,
+        'preview': list(items[:STREAM_PREVIEW_ITEMS])
+    }
+
+
+def choose_stream_format(route_cfg: Dict[str, Any], accept: str) -> str:
+    """
+    Pick the stream encoding from the Accept header, falling back to the route config.
+
+    Args:
+        route_cfg (Dict[str, Any]): Route configuration (may set 'stream_format')
+        accept (str): Value of the request's Accept header
+
+    Returns:
+        str: One of STREAM_FORMATS
+
+    Examples:
+        >>> choose_stream_format({}, 'application/x-ndjson')
+        'ndjson'
+        >>> choose_stream_format({'stream_format': 'ndjson'}, '*/*')
+        'ndjson'
+    """
+    if 'application/x-ndjson' in (accept or ''):
+        return 'ndjson'
+    fmt = route_cfg.get('stream_format', 'json')
+    return fmt if fmt in STREAM_FORMATS else 'json'
+
+
+async def encode_stream(items: Any, fmt: str,
+                        on_complete: Callable[[Dict[str, Any], bool], None],
+                        deadline: Optional[float] = None) -> AsyncIteratorType:
+    """
+    Encode a stream of items as a chunked JSON array or as NDJSON.
+
+    An exception raised by the stream is emitted as a final
+    {'success': False, 'error': ...} item, since the status line has already
+    been sent; so is a stream still running at the deadline, which is then
+    stopped and reported with 'timed_out' in its summary. When the stream
+    ends, on_complete receives a bounded summary of what was sent and
+    whether it finished cleanly.
+
+    Args:
+        items (Any): Sync or async iterator of JSON-serializable items
+        fmt (str): 'json' or 'ndjson'
+        on_complete (Callable): Called with (summary, success)
+        deadline (Optional[float]): time.perf_counter() value to stop the stream at, or None
+
+    Yields:
+        str: Encoded chunks
+    """
+    source = aiterate_with_deadline(items, deadline)
+    summary: Dict[str, Any] = {'streamed': True, 'format': fmt, 'items': 0, 'bytes': 0, 'preview': []}
+    success = True
+    completed = False
+
+    def chunk_for(item: Any) -> str:
+        encoded = json.dumps(item)
+        if fmt == 'ndjson':
+            return encoded + '\n'
+        return (',' if summary['items'] else '') + encoded
+
+    try:
+        if fmt == 'json':
+            summary['bytes'] += 1
+            yield '['
+
+        try:
+            async for item in source:
+                chunk = chunk_for(item)
+                if summary['items'] < STREAM_PREVIEW_ITEMS:
+                    summary['preview'].append(item)
+                summary['items'] += 1
+                summary['bytes'] += len(chunk)
+                yield chunk
+        except StreamTimeoutError:
+            success = False
+            summary['error'] = 'Gateway Timeout'
+            summary['timed_out'] = True
+            chunk = chunk_for({'success': False, 'error': 'Gateway Timeout',
+                               'detail': 'stream did not finish before its deadline'})
+            summary['bytes'] += len(chunk)
+            yield chunk
+        except Exception as e:
+            success = False
+            summary['error'] = str(e)
+            chunk = chunk_for({'success': False, 'error': str(e)})
+            summary['bytes'] += len(chunk)
+            yield chunk
+
+        if fmt == 'json':
+            summary['bytes'] += 1
+            yield ']'
+        completed = True
+    finally:
+        if not completed and success:
+            # The client went away before the stream finished
+            success = False
+            summary['error'] = 'stream aborted'
+        on_complete(summary, success)